@@ -23,14 +23,30 @@ Output JSON matches the Go struct at api/internal/bot/opening_book.go:
   {"entries": [BookEntry, ...]}
 """
 
+import argparse
+import gzip
+import heapq
 import json
 import logging
-import re
+import math
+import mmap
+import os
 import sys
 import time
-from collections import defaultdict
+from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import groupby, islice
+from multiprocessing import Pool
+from operator import itemgetter
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional; falls back to the stdlib encoder
+    orjson = None
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -42,6 +58,9 @@ GAMES_PATH = DATA_DIR / "processed" / "games.jsonl"
 OUTPUT_PATH = DATA_DIR / "processed" / "opening_book.json"
 ANALYSIS_PATH = DATA_DIR.parent / "benchmarks" / "opening-book-analysis.md"
 
+# Lines handed to each worker per task when --workers > 1.
+CHUNK_LINES = 2048
+
 POWERS = ["austria", "england", "france", "germany", "italy", "russia", "turkey"]
 
 # Phases to extract: Spring 1901 through Fall 1907
@@ -51,6 +70,7 @@ for _yr in range(1901, 1908):
     TARGET_PHASES.append(f"F{_yr}M")
     if _yr < 1907:
         TARGET_PHASES.append(f"W{_yr}A")
+TARGET_PHASES_SET = frozenset(TARGET_PHASES)
 
 MIN_ABS_COUNT = 10
 
@@ -65,6 +85,20 @@ def get_cond_threshold(year):
     else:
         return 0.01
 
+def min_variant_count(pos_total, cond_threshold):
+    """Smallest variant count that passes both the conditional and absolute thresholds.
+
+    Equivalent to keeping variants with count / pos_total >= cond_threshold and
+    count >= MIN_ABS_COUNT, but lets the caller filter with one int compare.
+    """
+    count = math.ceil(cond_threshold * pos_total)
+    # Nudge past float rounding so the cutoff agrees with the division exactly.
+    while count > 0 and (count - 1) / pos_total >= cond_threshold:
+        count -= 1
+    while count / pos_total < cond_threshold:
+        count += 1
+    return max(count, MIN_ABS_COUNT)
+
 def get_min_pos_games(year):
     """Minimum games for a position cluster to qualify."""
     if year <= 1901:
@@ -201,92 +235,224 @@ for a, b in _ADJACENCY_PAIRS:
     ADJ_GRAPH[a].add(b)
     ADJ_GRAPH[b].add(a)
 
+# Bit index for every unit location (provinces plus split coasts), used to
+# pack position and SC fingerprints into plain ints.
+_SPLIT_COAST_LOCS = ["bul/ec", "bul/sc", "spa/nc", "spa/sc", "stp/nc", "stp/sc"]
+PROVINCE_IDX = {
+    prov: i for i, prov in enumerate(sorted(PROVINCE_THEATER) + _SPLIT_COAST_LOCS)
+}
+
+# Bitmask (over PROVINCE_IDX) of each province's neighbors in ADJ_GRAPH.
+ADJ_MASK = {
+    prov: sum(1 << PROVINCE_IDX[adj] for adj in adjs) for prov, adjs in ADJ_GRAPH.items()
+}
+
+# Theater index (into ALL_THEATERS) of every unit location, split coasts
+# included, so the hot path never has to strip the coast suffix first.
+THEATER_IDX = {t: i for i, t in enumerate(ALL_THEATERS)}
+LOC_THEATER_IDX = {prov: THEATER_IDX[t] for prov, t in PROVINCE_THEATER.items()}
+LOC_THEATER_IDX.update(
+    (loc, LOC_THEATER_IDX[loc.partition("/")[0]]) for loc in _SPLIT_COAST_LOCS
+)
+
+# Canonical object for each province, unit-type, and order string seen, so
+# equal strings compare by identity and reuse their cached hash.
+_INTERN = {}
+_intern = _INTERN.setdefault
+
+
+def _intern_all(strings):
+    """Tuple of the canonical objects for ``strings``."""
+    return tuple([_intern(x, x) for x in strings])
+
 
 # ---------------------------------------------------------------------------
 # Utility functions
 # ---------------------------------------------------------------------------
 
+# Unit string -> parse_unit result, and location -> base_province result.
+# The map has only a few hundred distinct units, so both stay small.
+_UNIT_CACHE = {}
+_BASE_PROV = {}
+
+
 def parse_unit(unit_str):
     """Parse 'A par' or 'F stp/sc' into (type, province_with_coast)."""
-    parts = unit_str.strip().split()
-    if len(parts) < 2:
-        return None, None
-    return parts[0], parts[1]
+    parsed = _UNIT_CACHE.get(unit_str)
+    if parsed is None:
+        parts = unit_str.split()
+        if len(parts) < 2:
+            parsed = (None, None)
+        else:
+            parsed = (_intern(parts[0], parts[0]), _intern(parts[1], parts[1]))
+        _UNIT_CACHE[unit_str] = parsed
+    return parsed
 
 
 def base_province(loc):
     """Strip coast suffix: 'stp/sc' -> 'stp', 'par' -> 'par'."""
-    return loc.split("/")[0]
-
+    base = _BASE_PROV.get(loc)
+    if base is None:
+        base = _BASE_PROV[loc] = loc.partition("/")[0]
+    return base
 
-def compute_theater_presence(units_list):
-    """Count units per theater from a list like ['A par', 'F bre']."""
-    counts = {t: 0 for t in ALL_THEATERS}
-    for u in units_list:
-        _, loc = parse_unit(u)
-        if loc:
-            t = PROVINCE_THEATER.get(base_province(loc))
-            if t:
-                counts[t] += 1
-    return counts
 
-
-def compute_fleet_army(units_list):
-    """Count fleets and armies from a unit list."""
-    fleets, armies = 0, 0
-    for u in units_list:
-        utype, _ = parse_unit(u)
-        if utype == "F":
-            fleets += 1
-        elif utype == "A":
-            armies += 1
-    return fleets, armies
+# Unit string -> (army_bit, fleet_bit, armies, fleets, extra, theater_idx):
+# everything summarize_units needs from one unit, resolved once per string.
+_UNIT_FEATURES = {}
+_NO_UNIT = (0, 0, 0, 0, None, -1)
 
 
-def unit_fingerprint(units_list):
-    """Exact position fingerprint: sorted tuple of (type, loc)."""
-    parsed = []
+def _unit_features(unit_str):
+    """Resolve and cache summarize_units' per-unit contribution."""
+    utype, loc = parse_unit(unit_str)
+    if not (utype and loc):
+        feat = _NO_UNIT
+    else:
+        is_army = utype == "A"
+        idx = PROVINCE_IDX.get(loc)
+        bit = 0 if idx is None else 1 << idx
+        t = LOC_THEATER_IDX.get(loc)
+        if t is None:
+            t = LOC_THEATER_IDX.get(base_province(loc), -1)
+        feat = (
+            bit if is_army else 0,
+            0 if is_army else bit,
+            int(is_army),
+            int(utype == "F"),
+            (is_army, loc) if idx is None else None,
+            t,
+        )
+    _UNIT_FEATURES[unit_str] = feat
+    return feat
+
+
+def summarize_units(units_list):
+    """Derive every unit-list feature in a single pass.
+
+    Returns (fingerprint, theater_counts, fleets, armies) where the
+    fingerprint is an (army_mask, fleet_mask) pair of location bitmasks and
+    theater_counts is a tuple aligned with ALL_THEATERS. Locations outside
+    PROVINCE_IDX are carried in the fingerprint as a trailing frozenset so
+    the key never depends on per-process state.
+    """
+    mask_a = 0
+    mask_f = 0
+    extra = None
+    counts = [0] * len(ALL_THEATERS)
+    fleets = 0
+    armies = 0
+    features_get = _UNIT_FEATURES.get
     for u in units_list:
-        utype, loc = parse_unit(u)
-        if utype and loc:
-            parsed.append((utype, loc))
-    return tuple(sorted(parsed))
+        feat = features_get(u) or _unit_features(u)
+        a_bit, f_bit, n_army, n_fleet, unknown, t = feat
+        mask_a |= a_bit
+        mask_f |= f_bit
+        armies += n_army
+        fleets += n_fleet
+        if unknown is not None:
+            if extra is None:
+                extra = set()
+            extra.add(unknown)
+        if t >= 0:
+            counts[t] += 1
+
+    fingerprint = (mask_a, mask_f, frozenset(extra)) if extra else (mask_a, mask_f)
+    return fingerprint, tuple(counts), fleets, armies
 
 
 def sc_fingerprint(centers_list):
-    """SC ownership fingerprint: sorted tuple of owned SC names."""
-    return tuple(sorted(centers_list))
+    """SC ownership fingerprint: bitmask of owned SC names."""
+    mask = 0
+    extra = None
+    for sc in centers_list:
+        idx = PROVINCE_IDX.get(sc)
+        if idx is None:
+            if extra is None:
+                extra = set()
+            extra.add(sc)
+        else:
+            mask |= 1 << idx
+    if extra:
+        return (mask, frozenset(extra))
+    return mask
 
 
-def feature_fingerprint(units_list, centers_list):
+def feature_fingerprint(units_list, centers_list, summary=None):
     """Feature-based fingerprint for 1904+: (sc_count, theater_tuple, fleets, armies)."""
-    sc_count = len(centers_list)
-    theaters = compute_theater_presence(units_list)
-    fleets, armies = compute_fleet_army(units_list)
-    theater_tuple = tuple(theaters[t] for t in ALL_THEATERS)
-    return (sc_count, theater_tuple, fleets, armies)
+    if summary is None:
+        summary = summarize_units(units_list)
+    _, theater_tuple, fleets, armies = summary
+    return (len(centers_list), theater_tuple, fleets, armies)
+
+
+_SEASON_NAMES = {"S": "spring", "F": "fall", "W": "winter"}
+_PHASE_TYPE_NAMES = {"M": "movement", "R": "retreat", "A": "build"}
+
+
+def _is_phase_name(phase_name):
+    """True for names starting like 'S1901M': season, 4-digit year, type."""
+    return (
+        len(phase_name) >= 6
+        and phase_name[0] in _SEASON_NAMES
+        and phase_name[5] in _PHASE_TYPE_NAMES
+        and phase_name[1:5].isdecimal()
+    )
 
 
 def get_phase_year(phase_name):
     """Extract year from phase name like 'S1901M' -> 1901."""
-    m = re.match(r"[SFW](\d{4})[MRA]", phase_name)
-    return int(m.group(1)) if m else 0
+    return int(phase_name[1:5]) if _is_phase_name(phase_name) else 0
+
+
+# Year of each target phase, precomputed for the hot loops.
+PHASE_YEAR = {p: get_phase_year(p) for p in TARGET_PHASES}
 
 
-def get_cluster_key(phase_name, units_list, centers_list):
-    """Get the appropriate clustering key based on the phase year."""
-    year = get_phase_year(phase_name)
+# Clustering strategies, by era (see module docstring).
+CLUSTER_EXACT, CLUSTER_SC, CLUSTER_FEATURE = range(3)
+
+
+def get_cluster_strategy(year):
+    """Clustering strategy for a game year."""
     if year <= 1901:
-        return ("exact", unit_fingerprint(units_list))
+        return CLUSTER_EXACT
     elif year <= 1903:
-        return ("sc", sc_fingerprint(centers_list), unit_fingerprint(units_list))
+        return CLUSTER_SC
+    else:
+        return CLUSTER_FEATURE
+
+
+# Strategy of each target phase, so get_cluster_key is one dict lookup.
+PHASE_STRATEGY = {p: get_cluster_strategy(PHASE_YEAR[p]) for p in TARGET_PHASES}
+
+# Per-phase book thresholds, resolved once instead of per cluster.
+PHASE_COND_THRESHOLD = {p: get_cond_threshold(PHASE_YEAR[p]) for p in TARGET_PHASES}
+PHASE_MIN_POS = {p: get_min_pos_games(PHASE_YEAR[p]) for p in TARGET_PHASES}
+
+
+def get_cluster_key(phase_name, units_list, centers_list, summary=None):
+    """Get the appropriate clustering key based on the phase year.
+
+    ``summary`` is the summarize_units() result for ``units_list`` when the
+    caller already has it.
+    """
+    if summary is None:
+        summary = summarize_units(units_list)
+    strategy = PHASE_STRATEGY.get(phase_name)
+    if strategy is None:
+        strategy = get_cluster_strategy(get_phase_year(phase_name))
+    if strategy == CLUSTER_EXACT:
+        return ("exact", summary[0])
+    elif strategy == CLUSTER_SC:
+        return ("sc", sc_fingerprint(centers_list), summary[0])
     else:
-        return ("feature", feature_fingerprint(units_list, centers_list))
+        return ("feature", feature_fingerprint(units_list, centers_list, summary))
 
 
 def orders_fingerprint(orders_list):
-    """Hashable fingerprint from a list of order strings."""
-    return tuple(sorted(orders_list))
+    """Hashable, order-independent fingerprint from a list of order strings."""
+    return frozenset(orders_list)
 
 
 # ---------------------------------------------------------------------------
@@ -307,31 +473,41 @@ def build_unit_map(phase_data):
     return unit_map
 
 
-def compute_border_zone(our_scs, adj_graph):
-    """Compute the set of provinces adjacent to our SCs (excluding our own SCs).
+@lru_cache(maxsize=4096)
+def _border_zone_mask(our_scs):
+    """Provinces adjacent to our SCs (excluding our own SCs), as a bitmask.
 
-    Matches the Go neighbor_stance.go logic.
+    Matches the Go neighbor_stance.go logic. Memoized by the frozenset of
+    SCs; the cache is bounded since every cluster can bring a new set.
     """
-    border = set()
+    our_mask = 0
+    zone = 0
     for sc in our_scs:
-        for adj_prov in adj_graph.get(sc, set()):
-            if adj_prov not in our_scs:
-                border.add(adj_prov)
-    return border
+        idx = PROVINCE_IDX.get(sc)
+        if idx is not None:
+            our_mask |= 1 << idx
+        zone |= ADJ_MASK.get(sc, 0)
+    return zone & ~our_mask
+
+
+def _in_mask(prov, mask):
+    idx = PROVINCE_IDX.get(prov)
+    return idx is not None and (mask >> idx) & 1
 
 
-def classify_neighbor_stances(phase_data, power, centers_data):
+def classify_neighbor_stances(phase_data, power, centers_data, unit_map=None):
     """Classify each neighbor power's stance toward us based on unit positions.
 
     Replicates Go ClassifyNeighborStances: count neighbor units in our border
     zone, classify ratio >= 0.5 as aggressive, 0 as retreating, else neutral.
     """
-    our_scs = set(centers_data.get(power, []))
+    our_scs = frozenset(centers_data.get(power, []))
     if not our_scs:
         return {}
 
-    border_zone = compute_border_zone(our_scs, ADJ_GRAPH)
-    unit_map = build_unit_map(phase_data)
+    border_mask = _border_zone_mask(our_scs)
+    if unit_map is None:
+        unit_map = build_unit_map(phase_data)
 
     # Count each neighbor's units in our border zone vs total
     neighbor_stats = defaultdict(lambda: {"adjacent": 0, "total": 0})
@@ -339,7 +515,7 @@ def classify_neighbor_stances(phase_data, power, centers_data):
         if unit_power == power:
             continue
         neighbor_stats[unit_power]["total"] += 1
-        if prov in border_zone:
+        if _in_mask(prov, border_mask):
             neighbor_stats[unit_power]["adjacent"] += 1
 
     stances = {}
@@ -356,33 +532,79 @@ def classify_neighbor_stances(phase_data, power, centers_data):
     return stances
 
 
-def compute_border_pressure(phase_data, power, centers_data):
+def compute_border_pressure(phase_data, power, centers_data, unit_map=None):
     """Count enemy units adjacent to this power's SCs.
 
     Matches Go borderPressure function.
     """
-    our_scs = set(centers_data.get(power, []))
+    our_scs = frozenset(centers_data.get(power, []))
     if not our_scs:
         return 0
 
-    border_zone = compute_border_zone(our_scs, ADJ_GRAPH)
-    unit_map = build_unit_map(phase_data)
+    border_mask = _border_zone_mask(our_scs)
+    if unit_map is None:
+        unit_map = build_unit_map(phase_data)
 
     count = 0
-    for prov in border_zone:
-        if prov in unit_map:
-            unit_power, _ = unit_map[prov]
-            if unit_power != power:
-                count += 1
+    for prov, (unit_power, _) in unit_map.items():
+        if unit_power != power and _in_mask(prov, border_mask):
+            count += 1
     return count
 
 
-def count_border_bounces(phase_data, results_data, power, centers_data):
+def collect_bounced_moves(phase_data, results_data):
+    """List (power, target_province) for each move order behind a bounce.
+
+    The result does not depend on the power being scored, so it can be
+    computed once per phase and shared across count_border_bounces calls.
+    A bounced unit belongs to the first power listing a unit in its province.
+    """
+    bounced_srcs = []
+    for unit_key, result_list in results_data.items():
+        if "bounce" not in result_list:
+            continue
+        _, uloc = parse_unit(unit_key)
+        if uloc:
+            bounced_srcs.append(base_province(uloc))
+    if not bounced_srcs:
+        return []
+
+    owner = {}
+    for p, units in phase_data.get("units", {}).items():
+        for u in units:
+            _, loc = parse_unit(u)
+            if loc:
+                owner.setdefault(base_province(loc), p)
+
+    moves_by_prov = defaultdict(list)
+    for p, orders in phase_data.get("orders", {}).items():
+        for order_str in orders:
+            tokens = order_str.split()
+            if len(tokens) >= 4 and tokens[2] == "-":
+                moves_by_prov[p, base_province(tokens[1])].append(base_province(tokens[3]))
+
+    bounced = []
+    for src in bounced_srcs:
+        unit_power = owner.get(src)
+        if unit_power is None:
+            continue
+        for target in moves_by_prov.get((unit_power, src), ()):
+            bounced.append((unit_power, target))
+    return bounced
+
+
+def count_border_bounces(phase_data, results_data, power, centers_data, bounced_moves=None):
     """Count bounces where a neighbor tried to enter our territory.
 
     A border bounce occurs when an enemy order targets one of our provinces
-    and the result includes 'bounce'.
+    and the result includes 'bounce'. ``bounced_moves`` is the
+    collect_bounced_moves() result for this phase, if already computed.
     """
+    if bounced_moves is None:
+        bounced_moves = collect_bounced_moves(phase_data, results_data)
+    if not bounced_moves:
+        return 0
+
     our_provinces = set()
     for u in phase_data.get("units", {}).get(power, []):
         _, loc = parse_unit(u)
@@ -390,58 +612,35 @@ def count_border_bounces(phase_data, results_data, power, centers_data):
             our_provinces.add(base_province(loc))
     our_provinces.update(centers_data.get(power, []))
 
-    bounces = 0
-    for unit_key, result_list in results_data.items():
-        if "bounce" not in result_list:
-            continue
-        # Find the order for this unit — check all powers' orders
-        utype, uloc = parse_unit(unit_key)
-        if not uloc:
-            continue
-        unit_power = None
-        for p, units in phase_data.get("units", {}).items():
-            for u in units:
-                _, loc = parse_unit(u)
-                if loc and base_province(loc) == base_province(uloc):
-                    unit_power = p
-                    break
-            if unit_power:
-                break
-        if unit_power == power:
-            continue  # We bounced, not a neighbor
-
-        # Check if this unit's order targeted one of our provinces
-        for p, orders in phase_data.get("orders", {}).items():
-            if p != unit_power:
-                continue
-            for order_str in orders:
-                tokens = order_str.strip().split()
-                if len(tokens) >= 4 and tokens[2] == "-":
-                    order_loc = base_province(tokens[1])
-                    target = base_province(tokens[3])
-                    if order_loc == base_province(uloc) and target in our_provinces:
-                        bounces += 1
-    return bounces
+    return sum(
+        1 for unit_power, target in bounced_moves
+        if unit_power != power and target in our_provinces
+    )
 
 
 def get_neighbor_sc_counts(centers_data, power):
-    """Get SC count for each other power."""
-    counts = {}
-    for p in POWERS:
-        if p != power:
-            counts[p] = len(centers_data.get(p, []))
-    return counts
+    """Get SC count for each other power.
+
+    Returns a tuple aligned with POWERS, with -1 in ``power``'s own slot;
+    build_condition expands it to a name -> count dict.
+    """
+    return tuple([-1 if p == power else len(centers_data.get(p, [])) for p in POWERS])
 
 
-def compute_neighbor_features(phase_data, power, centers_data, results_data):
+def compute_neighbor_features(phase_data, power, centers_data, results_data,
+                              unit_map=None, bounced_moves=None):
     """Compute all neighbor behavior features for a power at a phase.
 
     Returns dict with neighbor_stance, border_pressure, border_bounces,
-    neighbor_sc_counts.
+    neighbor_sc_counts. Pass ``unit_map`` (from build_unit_map) and
+    ``bounced_moves`` (from collect_bounced_moves) to share them across the
+    powers of one phase.
     """
-    stances = classify_neighbor_stances(phase_data, power, centers_data)
-    pressure = compute_border_pressure(phase_data, power, centers_data)
-    bounces = count_border_bounces(phase_data, results_data, power, centers_data)
+    if unit_map is None:
+        unit_map = build_unit_map(phase_data)
+    stances = classify_neighbor_stances(phase_data, power, centers_data, unit_map)
+    pressure = compute_border_pressure(phase_data, power, centers_data, unit_map)
+    bounces = count_border_bounces(phase_data, results_data, power, centers_data, bounced_moves)
     sc_counts = get_neighbor_sc_counts(centers_data, power)
 
     return {
@@ -456,17 +655,26 @@ def compute_neighbor_features(phase_data, power, centers_data, results_data):
 # Condition building
 # ---------------------------------------------------------------------------
 
-def build_condition(units_list, centers_list, neighbor_features):
-    """Build a complete BookCondition dict with all feature tiers."""
+# Unit-type letter -> BookCondition position value (anything else is a fleet).
+_UTYPE_NAME = {"A": "army", "F": "fleet"}
+
+
+def build_condition(units_list, centers_list, neighbor_features, summary=None):
+    """Build a complete BookCondition dict with all feature tiers.
+
+    ``summary`` is the summarize_units() result for ``units_list``, if cached.
+    """
+    if summary is None:
+        summary = summarize_units(units_list)
+    _, theaters, fleets, armies = summary
     condition = {}
 
     # Tier 1: exact positions
-    positions = {}
-    for u in units_list:
-        utype, loc = parse_unit(u)
-        if utype and loc:
-            positions[loc] = "army" if utype == "A" else "fleet"
-    condition["positions"] = positions
+    condition["positions"] = {
+        loc: _UTYPE_NAME.get(utype, "fleet")
+        for utype, loc in map(parse_unit, units_list)
+        if utype and loc
+    }
 
     # Tier 2: SC ownership
     condition["owned_scs"] = sorted(centers_list)
@@ -478,12 +686,12 @@ def build_condition(units_list, centers_list, neighbor_features):
     condition["neighbor_stance"] = neighbor_features.get("neighbor_stance", {})
     condition["border_pressure"] = neighbor_features.get("border_pressure", 0)
     condition["border_bounces"] = neighbor_features.get("border_bounces", 0)
-    condition["neighbor_sc_counts"] = neighbor_features.get("neighbor_sc_counts", {})
+    condition["neighbor_sc_counts"] = {
+        p: c for p, c in zip(POWERS, neighbor_features.get("neighbor_sc_counts", ())) if c >= 0
+    }
 
     # Tier 4: theater/composition
-    theaters = compute_theater_presence(units_list)
-    condition["theaters"] = {t: c for t, c in theaters.items() if c > 0}
-    fleets, armies = compute_fleet_army(units_list)
+    condition["theaters"] = {t: c for t, c in zip(ALL_THEATERS, theaters) if c > 0}
     condition["fleet_count"] = fleets
     condition["army_count"] = armies
 
@@ -496,437 +704,690 @@ def build_condition(units_list, centers_list, neighbor_features):
 
 def parse_order_to_input(order_str):
     """Parse a textual order string into a Go-compatible OrderInput dict."""
-    tokens = order_str.strip().split()
-    if len(tokens) < 2:
-        return None
+    parsed = _parse_order_cached(order_str)
+    return dict(parsed) if parsed is not None else None
 
-    unit_type_char = tokens[0]
-    unit_loc = tokens[1]
-    unit_type = "army" if unit_type_char == "A" else "fleet"
 
-    loc_parts = unit_loc.split("/")
-    location = loc_parts[0]
-    coast = loc_parts[1] if len(loc_parts) > 1 else ""
+def _set_target(result, target_raw):
+    target_parts = target_raw.split("/")
+    result["target"] = target_parts[0]
+    if len(target_parts) > 1:
+        result["target_coast"] = target_parts[1]
 
-    result = {"unit_type": unit_type, "location": location}
-    if coast:
-        result["coast"] = coast
 
-    if len(tokens) == 2:
-        result["order_type"] = "hold"
-        return result
+def _parse_hold(tokens, result, location):
+    result["order_type"] = "hold"
+    return result
 
-    action = tokens[2]
 
-    if action == "H":
-        result["order_type"] = "hold"
-        return result
+def _parse_move(tokens, result, location):
+    result["order_type"] = "move"
+    _set_target(result, tokens[3] if len(tokens) > 3 else location)
+    return result
 
-    if action == "-":
-        target_raw = tokens[3] if len(tokens) > 3 else location
-        target_parts = target_raw.split("/")
-        result["order_type"] = "move"
-        result["target"] = target_parts[0]
-        if len(target_parts) > 1:
-            result["target_coast"] = target_parts[1]
-        return result
 
-    if action == "S":
-        if len(tokens) < 5:
-            aux_loc = tokens[3] if len(tokens) > 3 else location
-            result["order_type"] = "support"
-            result["aux_loc"] = aux_loc
-            result["aux_target"] = aux_loc
-            result["aux_unit_type"] = "army"
-            return result
-
-        aux_unit_type = "army" if tokens[3] == "A" else "fleet"
-        aux_loc_raw = tokens[4]
-        aux_loc = aux_loc_raw.split("/")[0]
-
-        if len(tokens) > 5 and tokens[5] == "-":
-            aux_target_raw = tokens[6] if len(tokens) > 6 else aux_loc
-            result["order_type"] = "support"
-            result["aux_loc"] = aux_loc
-            result["aux_target"] = aux_target_raw.split("/")[0]
-            result["aux_unit_type"] = aux_unit_type
-        else:
-            result["order_type"] = "support"
-            result["aux_loc"] = aux_loc
-            result["aux_target"] = aux_loc
-            result["aux_unit_type"] = aux_unit_type
+def _parse_support(tokens, result, location):
+    result["order_type"] = "support"
+    if len(tokens) < 5:
+        aux_loc = tokens[3] if len(tokens) > 3 else location
+        result["aux_loc"] = aux_loc
+        result["aux_target"] = aux_loc
+        result["aux_unit_type"] = "army"
         return result
 
-    if action == "C":
-        if len(tokens) >= 7 and tokens[5] == "-":
-            result["order_type"] = "convoy"
-            result["aux_loc"] = tokens[4]
-            result["aux_target"] = tokens[6]
-            result["aux_unit_type"] = "army" if tokens[3] == "A" else "fleet"
-        elif len(tokens) >= 5:
-            result["order_type"] = "convoy"
-            result["aux_loc"] = tokens[4] if len(tokens) > 4 else location
-            result["aux_unit_type"] = "army" if tokens[3] == "A" else "fleet"
-        return result
+    aux_loc = tokens[4].split("/")[0]
+    result["aux_loc"] = aux_loc
+    if len(tokens) > 5 and tokens[5] == "-":
+        aux_target_raw = tokens[6] if len(tokens) > 6 else aux_loc
+        result["aux_target"] = aux_target_raw.split("/")[0]
+    else:
+        result["aux_target"] = aux_loc
+    result["aux_unit_type"] = "army" if tokens[3] == "A" else "fleet"
+    return result
 
-    if action == "B":
-        result["order_type"] = "build"
-        return result
 
-    if action == "D":
-        result["order_type"] = "disband"
-        return result
+def _parse_convoy(tokens, result, location):
+    if len(tokens) >= 7 and tokens[5] == "-":
+        result["order_type"] = "convoy"
+        result["aux_loc"] = tokens[4]
+        result["aux_target"] = tokens[6]
+        result["aux_unit_type"] = "army" if tokens[3] == "A" else "fleet"
+    elif len(tokens) >= 5:
+        result["order_type"] = "convoy"
+        result["aux_loc"] = tokens[4]
+        result["aux_unit_type"] = "army" if tokens[3] == "A" else "fleet"
+    return result
 
-    if action == "R":
-        target_raw = tokens[3] if len(tokens) > 3 else location
-        target_parts = target_raw.split("/")
-        result["order_type"] = "retreat"
-        result["target"] = target_parts[0]
-        if len(target_parts) > 1:
-            result["target_coast"] = target_parts[1]
-        return result
 
-    result["order_type"] = "hold"
+def _parse_build(tokens, result, location):
+    result["order_type"] = "build"
+    return result
+
+
+def _parse_disband(tokens, result, location):
+    result["order_type"] = "disband"
     return result
 
 
+def _parse_retreat(tokens, result, location):
+    result["order_type"] = "retreat"
+    _set_target(result, tokens[3] if len(tokens) > 3 else location)
+    return result
+
+
+# Action token -> sub-parser; unknown actions fall back to a hold.
+_ORDER_PARSERS = {
+    "H": _parse_hold,
+    "-": _parse_move,
+    "S": _parse_support,
+    "C": _parse_convoy,
+    "B": _parse_build,
+    "D": _parse_disband,
+    "R": _parse_retreat,
+}
+
+
+@lru_cache(maxsize=None)
+def _parse_order_cached(order_str):
+    """Memoized parser body; callers get a copy via parse_order_to_input."""
+    tokens = order_str.split()
+    if len(tokens) < 2:
+        return None
+
+    loc_parts = tokens[1].split("/")
+    location = loc_parts[0]
+    result = {"unit_type": "army" if tokens[0] == "A" else "fleet", "location": location}
+    if len(loc_parts) > 1 and loc_parts[1]:
+        result["coast"] = loc_parts[1]
+
+    if len(tokens) == 2:
+        return _parse_hold(tokens, result, location)
+    return _ORDER_PARSERS.get(tokens[2], _parse_hold)(tokens, result, location)
+
+
 def parse_phase_to_fields(phase_name):
     """Parse 'S1901M' into (year, season, phase_type) for Go BookEntry."""
-    m = re.match(r"([SFW])(\d{4})([MRA])", phase_name)
-    if not m:
+    if not _is_phase_name(phase_name):
         return None, None, None
-    season_map = {"S": "spring", "F": "fall", "W": "winter"}
-    type_map = {"M": "movement", "R": "retreat", "A": "build"}
-    return int(m.group(2)), season_map[m.group(1)], type_map[m.group(3)]
+    return (
+        int(phase_name[1:5]),
+        _SEASON_NAMES[phase_name[0]],
+        _PHASE_TYPE_NAMES[phase_name[5]],
+    )
+
+
+# (year, season, phase_type) for each target phase, computed once.
+PHASE_FIELDS = {p: parse_phase_to_fields(p) for p in TARGET_PHASES}
 
 
 # ---------------------------------------------------------------------------
 # Main processing
 # ---------------------------------------------------------------------------
 
-def process_games():
+def extract_game_openings(game):
+    """Fingerprint every (power, target phase) a game contributes to the book.
+
+    Returns None if the game lacks S1901M/F1901M. Otherwise returns a list of
+    (power, phase_name, cluster_key, orders_key, final_sc, is_win, orders,
+    units, centers, unit_summary, phase) rows in phase order. A power stops
+    contributing at its first phase without orders, and every power stops at
+    the first missing target phase.
+    """
+    # Only the target phases are ever looked up, so skip the rest.
+    phases_by_name = {}
+    for p in game.get("phases", []):
+        name = p["name"]
+        if name in TARGET_PHASES_SET:
+            phases_by_name[name] = p
+    if "S1901M" not in phases_by_name or "F1901M" not in phases_by_name:
+        return None
+
+    outcome = game.get("outcome", {})
+    active = []
+    for power in POWERS:
+        power_outcome = outcome.get(power, {})
+        is_win = power_outcome.get("result") in ("solo", "draw")
+        final_sc = power_outcome.get("centers", 0)
+        active.append((power, final_sc, int(is_win)))
+
+    rows = []
+    for phase_name in TARGET_PHASES:
+        phase = phases_by_name.get(phase_name)
+        if not phase or not active:
+            break
+
+        orders_data = phase.get("orders", {})
+        units_data = phase.get("units", {})
+        centers_data = phase.get("centers", {})
+
+        still_active = []
+        for power, final_sc, is_win in active:
+            orders = orders_data.get(power, [])
+            if not orders:
+                continue
+            still_active.append((power, final_sc, is_win))
+            units = units_data.get(power, [])
+            centers = centers_data.get(power, [])
+            summary = summarize_units(units)
+            rows.append((
+                power, phase_name,
+                get_cluster_key(phase_name, units, centers, summary),
+                orders_fingerprint(orders),
+                final_sc, is_win, orders, units, centers, summary, phase,
+            ))
+        active = still_active
+
+    return rows
+
+
+# Field offsets of a cluster entry list (see process_games).
+COUNT, TOTAL_CENTERS, WINS, ORDERS, UNITS, CENTERS, NEIGHBOR_FEATURES, UNIT_SUMMARY = range(8)
+
+
+def _accumulate_lines(lines, clusters, phase_totals, pos_totals):
+    """Fold raw games.jsonl lines into the given aggregates.
+
+    Returns ``(games, skipped)`` for the lines consumed.
+    """
+    clusters_get = clusters.get
+    games = 0
+    skipped = 0
+    # Per-phase inputs to compute_neighbor_features for the phase that last
+    # needed them; rows arrive phase by phase, so one slot covers every power.
+    map_phase = None
+    unit_map = None
+    bounced_moves = None
+
+    for line in lines:
+        if line.isspace():
+            continue
+        # Cheap sniff: a usable game must mention "standard" and both 1901
+        # movement phases somewhere, so skip the full parse when it can't.
+        if (b'"standard"' not in line or b'"S1901M"' not in line
+                or b'"F1901M"' not in line):
+            skipped += 1
+            continue
+
+        try:
+            game = _json_loads(line)
+        except ValueError:  # JSONDecodeError or bad UTF-8
+            skipped += 1
+            continue
+
+        if game.get("map") != "standard":
+            skipped += 1
+            continue
+
+        rows = extract_game_openings(game)
+        if rows is None:
+            skipped += 1
+            continue
+
+        games += 1
+        for (power, phase_name, ckey, okey, final_sc, is_win,
+             orders, units, centers, summary, phase) in rows:
+            key = (power, phase_name, ckey, okey)
+            entry = clusters_get(key)
+            if entry is None:
+                if phase is not map_phase:
+                    map_phase = phase
+                    unit_map = build_unit_map(phase)
+                    bounced_moves = collect_bounced_moves(phase, phase.get("results", {}))
+                # Representatives outlive the parsed game; keep compact
+                # tuples of interned strings, never the JSON lists themselves.
+                entry = [
+                    1, final_sc, is_win,
+                    _intern_all(orders),
+                    _intern_all(units),
+                    _intern_all(centers),
+                    # Neighbor features from the full phase data
+                    compute_neighbor_features(
+                        phase, power, phase.get("centers", {}), phase.get("results", {}),
+                        unit_map, bounced_moves,
+                    ),
+                    summary,
+                ]
+                clusters[key] = entry
+            else:
+                entry[COUNT] += 1
+                entry[TOTAL_CENTERS] += final_sc
+                entry[WINS] += is_win
+
+            phase_totals[power, phase_name] += 1
+            pos_totals[power, phase_name, ckey] += 1
+
+    return games, skipped
+
+
+def _aggregate_chunk(lines):
+    """Pool worker: aggregate one chunk of lines into fresh local tables."""
+    clusters = {}
+    phase_totals = Counter()
+    pos_totals = Counter()
+    games, skipped = _accumulate_lines(lines, clusters, phase_totals, pos_totals)
+    return clusters, phase_totals, pos_totals, games, skipped, len(lines)
+
+
+def _merge_clusters(clusters, local):
+    """Fold a worker's cluster table into ``clusters``, keeping first-seen order."""
+    clusters_get = clusters.get
+    for key, src in local.items():
+        entry = clusters_get(key)
+        if entry is None:
+            # Pickling drops interning; restore it for the kept representative.
+            src[ORDERS] = _intern_all(src[ORDERS])
+            src[UNITS] = _intern_all(src[UNITS])
+            src[CENTERS] = _intern_all(src[CENTERS])
+            clusters[key] = src
+        else:
+            entry[COUNT] += src[COUNT]
+            entry[TOTAL_CENTERS] += src[TOTAL_CENTERS]
+            entry[WINS] += src[WINS]
+
+
+def _iter_mapped_lines(f):
+    """Yield the raw lines of an open binary file through a read-only mmap.
+
+    Lines are copied straight out of the page cache, skipping the buffered
+    reader's extra copy.
+    """
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:  # empty files cannot be mapped
+        return
+    with mm:
+        yield from iter(mm.readline, b"")
+
+
+def process_games(workers=1):
     """Stream through games.jsonl and aggregate opening data.
 
     For each power at each phase, stores:
       - Order clusters keyed by (position_cluster_key, orders_fingerprint)
       - Representative data: units, centers, orders, neighbor features
+
+    With ``workers > 1`` chunks of lines are aggregated in a process pool and
+    merged in file order, so the result matches a single-process run.
     """
     log.info("Reading games from %s", GAMES_PATH)
 
-    # power -> phase -> cluster_key -> orders_key ->
-    #   {count, total_centers, wins, orders, units, centers, neighbor_features}
-    clusters = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(
-        lambda: {"count": 0, "total_centers": 0, "wins": 0,
-                 "orders": None, "units": None, "centers": None,
-                 "neighbor_features": None}
-    ))))
+    # (power, phase, cluster_key, orders_key) ->
+    #   [count, total_centers, wins, orders, units, centers, neighbor_features,
+    #    unit_summary]
+    # with orders/units/centers as tuples of interned strings
+    clusters = {}
 
-    phase_totals = defaultdict(lambda: defaultdict(int))
+    # (power, phase) -> number of games contributing orders
+    phase_totals = Counter()
+    # (power, phase, cluster_key) -> games in that position cluster
+    pos_totals = Counter()
     total_games = 0
     skipped = 0
+    lines_read = 0
     start_time = time.time()
 
-    with open(GAMES_PATH, "r") as f:
-        for line_num, line in enumerate(f):
-            line = line.strip()
-            if not line:
-                continue
+    def log_progress(prev_lines):
+        if lines_read // 20000 > prev_lines // 20000:
+            elapsed = time.time() - start_time
+            log.info(
+                "  Processed %d lines (%d games, %d skipped) — %.0f lines/sec",
+                lines_read, total_games, skipped, lines_read / elapsed,
+            )
+
+    # Binary mode: both decoders accept raw UTF-8 bytes, so skip the text layer.
+    with open(GAMES_PATH, "rb") as f:
+        lines = _iter_mapped_lines(f)
+        chunks = iter(lambda: list(islice(lines, CHUNK_LINES)), [])
+
+        if workers <= 1:
+            for chunk in chunks:
+                games, skip = _accumulate_lines(chunk, clusters, phase_totals, pos_totals)
+                total_games += games
+                skipped += skip
+                prev, lines_read = lines_read, lines_read + len(chunk)
+                log_progress(prev)
+        else:
+            log.info("Aggregating with %d worker processes", workers)
+            with Pool(workers) as pool:
+                # imap (not imap_unordered) so merges happen in file order and
+                # first-seen representatives match the serial path.
+                for local, local_phase, local_pos, games, skip, chunk_len in pool.imap(
+                    _aggregate_chunk, chunks
+                ):
+                    _merge_clusters(clusters, local)
+                    phase_totals.update(local_phase)
+                    pos_totals.update(local_pos)
+                    total_games += games
+                    skipped += skip
+                    prev, lines_read = lines_read, lines_read + chunk_len
+                    log_progress(prev)
 
-            try:
-                game = json.loads(line)
-            except json.JSONDecodeError:
-                skipped += 1
-                continue
+    elapsed = time.time() - start_time
+    log.info("Done: %d games processed, %d skipped in %.1fs", total_games, skipped, elapsed)
+    return clusters, phase_totals, pos_totals, total_games
 
-            if game.get("map") != "standard":
-                skipped += 1
-                continue
 
-            phase_names_set = {p["name"] for p in game.get("phases", [])}
-            if "S1901M" not in phase_names_set or "F1901M" not in phase_names_set:
-                skipped += 1
+def build_opening_book(clusters, phase_totals, pos_totals, total_games):
+    """Convert raw clusters into the Go-compatible OpeningBook JSON format.
+
+    Consumes ``clusters``. Position clusters with too few games are dropped
+    up front using ``pos_totals``; the surviving variants are sorted once into
+    (power, phase, first-seen cluster) order and emitted group by group.
+
+    Returns ``(book_data, covered_games)`` where ``covered_games`` counts the
+    games behind book options per (power, phase) for the analysis report.
+    """
+    book_entries = []
+    covered_games = Counter()
+
+    power_idx = {p: i for i, p in enumerate(POWERS)}
+    phase_idx = {p: i for i, p in enumerate(TARGET_PHASES)}
+
+    # pos_totals is in first-seen order, so its index ranks clusters the way
+    # the nested walk used to visit them.
+    cluster_rank = {}
+    for rank, (pkey, pos_total) in enumerate(pos_totals.items()):
+        power, phase_name, _ckey = pkey
+        if pos_total >= PHASE_MIN_POS[phase_name]:
+            cluster_rank[pkey] = (power_idx[power], phase_idx[phase_name], rank)
+
+    qualifying = [kv for kv in clusters.items() if kv[0][:3] in cluster_rank]
+    clusters.clear()
+    qualifying.sort(key=lambda kv: cluster_rank[kv[0][:3]])
+
+    for (power, phase_name, ckey), group in groupby(qualifying, key=lambda kv: kv[0][:3]):
+        order_variants = [entry for _key, entry in group]
+        pos_total = pos_totals[power, phase_name, ckey]
+        total_for_phase = phase_totals[power, phase_name]
+        cond_threshold = PHASE_COND_THRESHOLD[phase_name]
+        name_prefix = f"{power}_{phase_name}_"
+
+        best = max(order_variants, key=itemgetter(COUNT))
+        min_count = min_variant_count(pos_total, cond_threshold)
+        if best[COUNT] < min_count:
+            continue
+
+        options = []
+        option_games = 0
+        for data in order_variants:
+            count = data[COUNT]
+            if count < min_count:
                 continue
+            option_games += count
+            cond_freq = count / pos_total
+
+            parsed_orders = []
+            for o in data[ORDERS]:
+                parsed = parse_order_to_input(o)
+                if parsed:
+                    parsed_orders.append(parsed)
+
+            options.append({
+                "name": "",
+                "weight": round(cond_freq, 4),
+                "orders": parsed_orders,
+                "_games": count,
+                "_pos_games": pos_total,
+                "_global_freq": round(count / total_for_phase, 4),
+                "_avg_centers": round(data[TOTAL_CENTERS] / count, 2),
+                "_win_rate": round(data[WINS] / count, 4),
+            })
+
+        if not options:
+            continue
 
-            total_games += 1
-            phases_by_name = {p["name"]: p for p in game.get("phases", [])}
-            outcome = game.get("outcome", {})
-
-            for power in POWERS:
-                power_outcome = outcome.get(power, {})
-                is_win = power_outcome.get("result") in ("solo", "draw")
-                final_sc = power_outcome.get("centers", 0)
-
-                for phase_name in TARGET_PHASES:
-                    phase = phases_by_name.get(phase_name)
-                    if not phase:
-                        break
-
-                    orders = phase.get("orders", {}).get(power, [])
-                    units = phase.get("units", {}).get(power, [])
-                    centers_data = phase.get("centers", {})
-                    centers = centers_data.get(power, [])
-                    results = phase.get("results", {})
-
-                    if not orders:
-                        break
-
-                    ckey = get_cluster_key(phase_name, units, centers)
-                    okey = orders_fingerprint(orders)
-
-                    entry = clusters[power][phase_name][ckey][okey]
-                    entry["count"] += 1
-                    entry["total_centers"] += final_sc
-                    if is_win:
-                        entry["wins"] += 1
-                    if entry["orders"] is None:
-                        entry["orders"] = orders
-                        entry["units"] = units
-                        entry["centers"] = centers
-                        # Compute neighbor features from the full phase data
-                        entry["neighbor_features"] = compute_neighbor_features(
-                            phase, power, centers_data, results
-                        )
-
-                    phase_totals[power][phase_name] += 1
-
-            if (line_num + 1) % 20000 == 0:
-                elapsed = time.time() - start_time
-                rate = (line_num + 1) / elapsed
-                log.info(
-                    "  Processed %d lines (%d games, %d skipped) — %.0f lines/sec",
-                    line_num + 1, total_games, skipped, rate,
-                )
+        options.sort(key=itemgetter("weight"), reverse=True)
+        for i, opt in enumerate(options):
+            opt["name"] = f"{name_prefix}{i+1}"
 
-    elapsed = time.time() - start_time
-    log.info("Done: %d games processed, %d skipped in %.1fs", total_games, skipped, elapsed)
-    return clusters, phase_totals, total_games
+        # Use representative data from the highest-count variant
+        rep_units = best[UNITS]
+        rep_centers = best[CENTERS]
+        rep_nf = best[NEIGHBOR_FEATURES]
 
+        yr, season, phase_type = PHASE_FIELDS[phase_name]
+        condition = build_condition(rep_units, rep_centers, rep_nf, best[UNIT_SUMMARY])
 
-def build_opening_book(clusters, phase_totals, total_games):
-    """Convert raw clusters into the Go-compatible OpeningBook JSON format."""
-    book_entries = []
+        book_entries.append({
+            "power": power,
+            "year": yr,
+            "season": season,
+            "phase": phase_type,
+            "condition": condition,
+            "options": options,
+        })
+        covered_games[power, phase_name] += option_games
 
-    for power in POWERS:
-        for phase_name in TARGET_PHASES:
-            total_for_phase = phase_totals[power][phase_name]
-            if total_for_phase == 0:
-                continue
+    return {"entries": book_entries}, covered_games
 
-            year = get_phase_year(phase_name)
-            min_pos = get_min_pos_games(year)
-            cond_threshold = get_cond_threshold(year)
-
-            phase_clusters = clusters[power][phase_name]
-
-            for ckey, order_variants in phase_clusters.items():
-                pos_total = sum(d["count"] for d in order_variants.values())
-                if pos_total < min_pos:
-                    continue
-
-                options = []
-                for okey, data in order_variants.items():
-                    cond_freq = data["count"] / pos_total
-                    if cond_freq < cond_threshold or data["count"] < MIN_ABS_COUNT:
-                        continue
-
-                    parsed_orders = []
-                    for o in data["orders"]:
-                        parsed = parse_order_to_input(o)
-                        if parsed:
-                            parsed_orders.append(parsed)
-
-                    options.append({
-                        "name": "",
-                        "weight": round(cond_freq, 4),
-                        "orders": parsed_orders,
-                        "_games": data["count"],
-                        "_pos_games": pos_total,
-                        "_global_freq": round(data["count"] / total_for_phase, 4),
-                        "_avg_centers": round(data["total_centers"] / data["count"], 2),
-                        "_win_rate": round(data["wins"] / data["count"], 4),
-                    })
-
-                if not options:
-                    continue
-
-                options.sort(key=lambda e: -e["weight"])
-                for i, opt in enumerate(options):
-                    opt["name"] = f"{power}_{phase_name}_{i+1}"
-
-                # Use representative data from the highest-count variant
-                best = max(order_variants.values(), key=lambda d: d["count"])
-                rep_units = best["units"] or []
-                rep_centers = best["centers"] or []
-                rep_nf = best["neighbor_features"] or {}
-
-                yr, season, phase_type = parse_phase_to_fields(phase_name)
-                condition = build_condition(rep_units, rep_centers, rep_nf)
-
-                book_entries.append({
-                    "power": power,
-                    "year": yr,
-                    "season": season,
-                    "phase": phase_type,
-                    "condition": condition,
-                    "options": options,
-                })
-
-    return {"entries": book_entries}
+
+def write_opening_book(book_data, path, gzip_path=None):
+    """Write the book as JSON with 2-space indentation.
+
+    orjson serializes the whole book in one C call. The stdlib fallback
+    json.dump already writes in chunks as it encodes. Both produce the
+    same bytes. If ``gzip_path`` is given, the same JSON is also written
+    there gzip-compressed (level 1: fast, still several times smaller).
+    """
+    if orjson is not None:
+        data = orjson.dumps(book_data, option=orjson.OPT_INDENT_2)
+        with open(path, "wb") as f:
+            f.write(data)
+        if gzip_path is not None:
+            with gzip.open(gzip_path, "wb", compresslevel=1) as f:
+                f.write(data)
+    else:
+        with open(path, "w") as f:
+            json.dump(book_data, f, indent=2)
+        if gzip_path is not None:
+            with gzip.open(gzip_path, "wt", compresslevel=1) as f:
+                json.dump(book_data, f, indent=2)
 
 
 # ---------------------------------------------------------------------------
 # Analysis report
 # ---------------------------------------------------------------------------
 
-def generate_analysis(book_data, phase_totals, total_games):
-    """Generate the markdown analysis report."""
+def _brief_join(orders, limit=60):
+    """'; '-joined brief orders, cut to ``limit`` chars with a '...' tail.
+
+    Stops formatting once the text is past ``limit``; later orders could
+    only land in the part that gets cut.
+    """
+    parts = []
+    length = -2  # no separator before the first part
+    for o in orders:
+        s = format_order_brief(o)
+        parts.append(s)
+        length += len(s) + 2
+        if length > limit:
+            break
+    joined = "; ".join(parts)
+    if len(joined) > limit:
+        return joined[:limit - 3] + "..."
+    return joined
+
+
+def _option_weight(pair):
+    return pair[1]["weight"]
+
+
+# Top Openings row: rank, cond%, games, avg SCs, win%, pressure, orders.
+_TOP_ROW = "| {} | {:.1%} | {:,} | {:.1f} | {:.1%} | {} | {} |\n".format
+
+
+def generate_analysis(book_data, phase_totals, covered_games, total_games):
+    """Generate the markdown analysis report as a stream of text chunks."""
     entries = book_data["entries"]
-    lines = [
-        "# Opening Book Analysis",
-        "",
-        f"**Total games analyzed:** {total_games:,}",
-        f"**Phases covered:** Spring 1901 through Fall 1907",
-        f"**Map:** Standard only",
-        f"**Clustering:** exact positions (1901), SC ownership (1902-1903), features (1904+)",
-        f"**Neighbor features:** stance classification, border pressure, bounces, SC counts",
-        "",
-    ]
+
+    # Index entries by (power, phase) once; every section below reads from it.
+    by_pp = defaultdict(list)
+    powers_present = set()
+    phase_clusters = Counter()
+    phase_variants = Counter()
+    for e in entries:
+        phase = _phase_code(e)
+        by_pp[e["power"], phase].append(e)
+        powers_present.add(e["power"])
+        phase_clusters[phase] += 1
+        phase_variants[phase] += len(e["options"])
+
+    yield (
+        "# Opening Book Analysis\n"
+        "\n"
+        f"**Total games analyzed:** {total_games:,}\n"
+        "**Phases covered:** Spring 1901 through Fall 1907\n"
+        "**Map:** Standard only\n"
+        "**Clustering:** exact positions (1901), SC ownership (1902-1903), features (1904+)\n"
+        "**Neighbor features:** stance classification, border pressure, bounces, SC counts\n"
+        "\n"
+    )
 
     total_options = sum(len(e["options"]) for e in entries)
-    lines.append(f"**Total position clusters:** {len(entries):,}")
-    lines.append(f"**Total order variants:** {total_options:,}")
-    lines.append("")
+    yield f"**Total position clusters:** {len(entries):,}\n"
+    yield f"**Total order variants:** {total_options:,}\n\n"
 
     # Phase distribution
-    lines.append("## Phase Distribution")
-    lines.append("")
-    lines.append("| Phase | Clusters | Variants |")
-    lines.append("|-------|----------|----------|")
+    yield "## Phase Distribution\n\n"
+    yield "| Phase | Clusters | Variants |\n|-------|----------|----------|\n"
     for phase in TARGET_PHASES:
-        phase_entries = [e for e in entries if _phase_code(e) == phase]
-        n_variants = sum(len(e["options"]) for e in phase_entries)
-        if phase_entries or n_variants:
-            lines.append(f"| {phase} | {len(phase_entries)} | {n_variants} |")
-    lines.append("")
+        n_clusters = phase_clusters[phase]
+        n_variants = phase_variants[phase]
+        if n_clusters or n_variants:
+            yield f"| {phase} | {n_clusters} | {n_variants} |\n"
+    yield "\n"
 
     # Coverage by year
-    lines.append("## Coverage Statistics")
-    lines.append("")
-    lines.append("Percentage of games where at least one book entry matches.")
+    yield "## Coverage Statistics\n\n"
+    yield "Percentage of games where at least one book entry matches.\n"
 
-    for yr in sorted(set(get_phase_year(p) for p in TARGET_PHASES)):
-        year_phases = [p for p in TARGET_PHASES if get_phase_year(p) == yr]
+    for yr in sorted(set(PHASE_YEAR.values())):
+        year_phases = [p for p in TARGET_PHASES if PHASE_YEAR[p] == yr]
         if not year_phases:
             continue
-        lines.append("")
-        lines.append(f"### {yr}")
-        lines.append("")
-        header = "| Power |"
-        sep = "|-------|"
-        for phase in year_phases:
-            header += f" {phase} |"
-            sep += "--------|"
-        lines.append(header)
-        lines.append(sep)
+        yield "\n"
+        yield f"### {yr}\n\n"
+        yield f"| Power | {' | '.join(year_phases)} |\n"
+        yield f"|-------|{'--------|' * len(year_phases)}\n"
 
         for power in POWERS:
-            row = f"| {power.capitalize()} |"
+            cells = [power.capitalize()]
             for phase in year_phases:
-                total = phase_totals[power][phase]
+                total = phase_totals[power, phase]
                 if total == 0:
-                    row += " N/A |"
-                    continue
-                covered = sum(
-                    opt["_games"]
-                    for e in entries
-                    if e["power"] == power and _phase_code(e) == phase
-                    for opt in e["options"]
-                )
-                pct = min(100.0, 100.0 * covered / total)
-                row += f" {pct:.1f}% |"
-            lines.append(row)
-    lines.append("")
+                    cells.append("N/A")
+                else:
+                    pct = min(100.0, 100.0 * covered_games[power, phase] / total)
+                    cells.append(f"{pct:.1f}%")
+            yield f"| {' | '.join(cells)} |\n"
+    yield "\n"
 
     # Neighbor stance distribution sample
-    lines.append("## Neighbor Stance Distribution (Sample)")
-    lines.append("")
-    lines.append("Distribution of neighbor stances in book entries for selected powers at F1901M.")
-    lines.append("")
+    yield "## Neighbor Stance Distribution (Sample)\n\n"
+    yield "Distribution of neighbor stances in book entries for selected powers at F1901M.\n\n"
 
     for power in ["france", "germany", "austria"]:
-        f1901_entries = [
-            e for e in entries
-            if e["power"] == power and _phase_code(e) == "F1901M"
-        ]
+        f1901_entries = by_pp.get((power, "F1901M"), [])
         if not f1901_entries:
             continue
-        lines.append(f"**{power.capitalize()} F1901M** ({len(f1901_entries)} clusters):")
-        lines.append("")
+        yield f"**{power.capitalize()} F1901M** ({len(f1901_entries)} clusters):\n\n"
         # Aggregate stances across clusters
-        stance_counts = defaultdict(lambda: defaultdict(int))
+        stance_counts = Counter()
         for e in f1901_entries:
-            for neighbor, stance in e["condition"].get("neighbor_stance", {}).items():
-                stance_counts[neighbor][stance] += 1
-        for neighbor in sorted(stance_counts.keys()):
-            stances = stance_counts[neighbor]
-            parts = [f"{s}: {c}" for s, c in sorted(stances.items())]
-            lines.append(f"- vs {neighbor}: {', '.join(parts)}")
-        lines.append("")
+            stance_counts.update(e["condition"].get("neighbor_stance", {}).items())
+        for neighbor, group in groupby(sorted(stance_counts.items()), key=lambda kv: kv[0][0]):
+            parts = [f"{s}: {c}" for (_, s), c in group]
+            yield f"- vs {neighbor}: {', '.join(parts)}\n"
+        yield "\n"
 
     # Top openings per power per phase
-    lines.append("## Top Openings by Power and Phase")
-    lines.append("")
+    yield "## Top Openings by Power and Phase\n\n"
 
+    top_row = _TOP_ROW
     for power in POWERS:
-        power_entries = [e for e in entries if e["power"] == power]
-        if not power_entries:
+        if power not in powers_present:
             continue
 
-        lines.append(f"### {power.capitalize()}")
-        lines.append("")
+        yield f"### {power.capitalize()}\n\n"
 
         for phase in TARGET_PHASES:
-            phase_entries = [e for e in power_entries if _phase_code(e) == phase]
+            phase_entries = by_pp.get((power, phase))
             if not phase_entries:
                 continue
 
-            lines.append(f"#### {phase}")
-            lines.append("")
+            yield f"#### {phase}\n\n"
 
-            all_opts = []
-            for pe in phase_entries:
-                for opt in pe["options"]:
-                    all_opts.append((pe, opt))
-            all_opts.sort(key=lambda x: -x[1]["weight"])
+            all_opts = [(pe, opt) for pe in phase_entries for opt in pe["options"]]
+            top_opts = heapq.nlargest(5, all_opts, key=_option_weight)
 
-            lines.append("| # | Cond% | Games | Avg SCs | Win% | Pressure | Orders |")
-            lines.append("|---|-------|-------|---------|------|----------|--------|")
+            yield (
+                "| # | Cond% | Games | Avg SCs | Win% | Pressure | Orders |\n"
+                "|---|-------|-------|---------|------|----------|--------|\n"
+            )
 
-            for i, (pe, v) in enumerate(all_opts[:5]):
-                orders_str = "; ".join(format_order_brief(o) for o in v["orders"])
-                if len(orders_str) > 60:
-                    orders_str = orders_str[:57] + "..."
+            for i, (pe, v) in enumerate(top_opts):
+                orders_str = _brief_join(v["orders"])
                 pressure = pe["condition"].get("border_pressure", 0)
-                lines.append(
-                    f"| {i+1} | {v['weight']:.1%} "
-                    f"| {v['_games']:,} "
-                    f"| {v['_avg_centers']:.1f} | {v['_win_rate']:.1%} "
-                    f"| {pressure} | {orders_str} |"
+                yield top_row(
+                    i + 1, v["weight"], v["_games"], v["_avg_centers"], v["_win_rate"],
+                    pressure, orders_str,
                 )
 
-            lines.append("")
+            yield "\n"
+
+    yield "*Generated by `data/scripts/extract_openings.py`*"
 
-    lines.append(f"*Generated by `data/scripts/extract_openings.py`*")
-    return "\n".join(lines)
+
+_SEASON_CODES = {name: code for code, name in _SEASON_NAMES.items()}
+_PHASE_TYPE_CODES = {name: code for code, name in _PHASE_TYPE_NAMES.items()}
 
 
 def _phase_code(entry):
     """Reconstruct phase code like 'S1901M' from BookEntry fields."""
-    season_map = {"spring": "S", "fall": "F", "winter": "W"}
-    type_map = {"movement": "M", "retreat": "R", "build": "A"}
-    s = season_map.get(entry["season"], "S")
-    t = type_map.get(entry["phase"], "M")
-    return f"{s}{entry['year']}{t}"
+    return _phase_code_for(entry["season"], entry["year"], entry["phase"])
+
+
+@lru_cache(maxsize=None)
+def _phase_code_for(season, year, phase):
+    s = _SEASON_CODES.get(season, "S")
+    t = _PHASE_TYPE_CODES.get(phase, "M")
+    return f"{s}{year}{t}"
+
+
+def _target_coast_suffix(order):
+    return f"/{order['target_coast']}" if order.get("target_coast") else ""
+
+
+def _brief_support(order, ut, loc, coast):
+    aux_loc = order.get("aux_loc", "?")
+    aux_target = order.get("aux_target", "?")
+    if aux_loc == aux_target:
+        return f"{ut} {loc}{coast} S {aux_loc}"
+    return f"{ut} {loc}{coast} S {aux_loc}-{aux_target}"
+
+
+def _brief_move(order, ut, loc, coast):
+    return f"{ut} {loc}{coast}-{order.get('target', '?')}{_target_coast_suffix(order)}"
+
+
+def _brief_convoy(order, ut, loc, coast):
+    return f"{ut} {loc} C {order.get('aux_loc', '?')}-{order.get('aux_target', '?')}"
+
+
+def _brief_retreat(order, ut, loc, coast):
+    return f"{ut} {loc}{coast} R {order.get('target', '?')}{_target_coast_suffix(order)}"
+
+
+# order_type -> formatter(order, unit_char, location, coast_suffix)
+_BRIEF_FORMATTERS = {
+    "hold": lambda o, ut, loc, coast: f"{ut} {loc}{coast} H",
+    "move": _brief_move,
+    "support": _brief_support,
+    "convoy": _brief_convoy,
+    "build": lambda o, ut, loc, coast: f"{ut} {loc}{coast} B",
+    "disband": lambda o, ut, loc, coast: f"{ut} {loc}{coast} D",
+    "retreat": _brief_retreat,
+}
 
 
 def format_order_brief(order):
@@ -934,29 +1395,11 @@ def format_order_brief(order):
     ot = order.get("order_type", "?")
     loc = order.get("location", "?")
     ut = "A" if order.get("unit_type") == "army" else "F"
+    fmt = _BRIEF_FORMATTERS.get(ot)
+    if fmt is None:
+        return f"{ut} {loc} {ot}"
     coast = f"/{order['coast']}" if order.get("coast") else ""
-
-    if ot == "hold":
-        return f"{ut} {loc}{coast} H"
-    elif ot == "move":
-        tc = f"/{order['target_coast']}" if order.get("target_coast") else ""
-        return f"{ut} {loc}{coast}-{order.get('target', '?')}{tc}"
-    elif ot == "support":
-        aux_loc = order.get("aux_loc", "?")
-        aux_target = order.get("aux_target", "?")
-        if aux_loc == aux_target:
-            return f"{ut} {loc}{coast} S {aux_loc}"
-        return f"{ut} {loc}{coast} S {aux_loc}-{aux_target}"
-    elif ot == "convoy":
-        return f"{ut} {loc} C {order.get('aux_loc', '?')}-{order.get('aux_target', '?')}"
-    elif ot == "build":
-        return f"{ut} {loc}{coast} B"
-    elif ot == "disband":
-        return f"{ut} {loc}{coast} D"
-    elif ot == "retreat":
-        tc = f"/{order['target_coast']}" if order.get("target_coast") else ""
-        return f"{ut} {loc}{coast} R {order.get('target', '?')}{tc}"
-    return f"{ut} {loc} {ot}"
+    return fmt(order, ut, loc, coast)
 
 
 # ---------------------------------------------------------------------------
@@ -964,31 +1407,47 @@ def format_order_brief(order):
 # ---------------------------------------------------------------------------
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Extract the opening book from historical Diplomacy games"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help="Processes used to aggregate games (1 = no pool)",
+    )
+    parser.add_argument(
+        "--gzip", action="store_true",
+        help="Also write a gzip-compressed copy of the book next to it (.json.gz)",
+    )
+    args = parser.parse_args()
+
     if not GAMES_PATH.exists():
         log.error("games.jsonl not found at %s", GAMES_PATH)
         sys.exit(1)
 
     log.info("Starting opening book extraction (S1901M through F1907M)")
 
-    clusters, phase_totals, total_games = process_games()
+    clusters, phase_totals, pos_totals, total_games = process_games(args.workers)
 
     log.info("Building opening book entries")
-    book_data = build_opening_book(clusters, phase_totals, total_games)
+    book_data, covered_games = build_opening_book(clusters, phase_totals, pos_totals, total_games)
 
     total_entries = len(book_data["entries"])
     total_options = sum(len(e["options"]) for e in book_data["entries"])
-    log.info("Generated %d order variants across %d position clusters", total_options, total_entries)
+    log.info("Generated %d order variants across %d position clusters",
+             total_options, total_entries)
 
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_PATH, "w") as f:
-        json.dump(book_data, f, indent=2)
+    gzip_path = OUTPUT_PATH.with_name(OUTPUT_PATH.name + ".gz") if args.gzip else None
+    write_opening_book(book_data, OUTPUT_PATH, gzip_path)
     size_kb = OUTPUT_PATH.stat().st_size / 1024
     log.info("Wrote opening book to %s (%.1f KB)", OUTPUT_PATH, size_kb)
+    if gzip_path is not None:
+        log.info("Wrote compressed copy to %s (%.1f KB)",
+                 gzip_path, gzip_path.stat().st_size / 1024)
 
-    analysis = generate_analysis(book_data, phase_totals, total_games)
     ANALYSIS_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(ANALYSIS_PATH, "w") as f:
-        f.write(analysis)
+    with open(ANALYSIS_PATH, "w", buffering=1 << 20) as f:
+        f.writelines(generate_analysis(book_data, phase_totals, covered_games, total_games))
     log.info("Wrote analysis to %s", ANALYSIS_PATH)
 
     print(f"\n=== Opening Book Summary ===")
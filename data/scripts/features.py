@@ -17,9 +17,9 @@ import argparse
 import hashlib
 import json
 import logging
-import re
 import sys
 from collections import defaultdict
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
@@ -58,6 +58,14 @@ SEA_PROVINCES = {
     "ska", "tys", "wes",
 }
 
+# All supply center provinces on the standard map.
+_ALL_SC = frozenset([
+    "ank", "bel", "ber", "bre", "bud", "bul", "con", "den", "edi",
+    "gre", "hol", "kie", "lon", "lvp", "mar", "mos", "mun", "nap",
+    "nwy", "par", "por", "rom", "rum", "ser", "sev", "smy", "spa",
+    "stp", "swe", "tri", "tun", "ven", "vie", "war",
+])
+
 # ---- Feature layout (47 features per area) ----
 # [0:3]   Unit present: [army, fleet, empty]
 # [3:11]  Unit owner: [A, E, F, G, I, R, T, none]
@@ -202,10 +210,9 @@ def build_adjacency_matrix() -> np.ndarray:
             adj[base_idx, var_idx] = 1.0
             adj[var_idx, base_idx] = 1.0
             # Variant inherits all base adjacencies
-            for k in range(NUM_AREAS):
-                if adj[base_idx, k] == 1.0:
-                    adj[var_idx, k] = 1.0
-                    adj[k, var_idx] = 1.0
+            base_row = adj[base_idx].copy()
+            adj[var_idx] = np.maximum(adj[var_idx], base_row)
+            adj[:, var_idx] = np.maximum(adj[:, var_idx], base_row)
 
     # Self-loops (useful for GNN message passing)
     np.fill_diagonal(adj, 1.0)
@@ -223,6 +230,13 @@ def _province_type_vec(prov: str) -> list[int]:
     return [0, 0, 1]  # coastal (includes split-coast)
 
 
+# Province-type channels are identical on every board, so build them once.
+_PROVINCE_TYPE_BLOCK = np.array([_province_type_vec(a) for a in AREAS], dtype=np.uint8)
+
+# Areas whose base province is a supply center (bicoastal variants included).
+_SC_AREA_MASK = np.array([a.split("/")[0] in _ALL_SC for a in AREAS])
+
+
 def _parse_unit_string(unit_str: str) -> tuple[str, str, str]:
     """Parse 'A par' or 'F spa/nc' into (unit_type, province, coast).
 
@@ -250,14 +264,12 @@ def encode_board_state(phase: dict, prev_phase: dict | None = None) -> np.ndarra
             with "empty" markers.
 
     Returns:
-        np.ndarray of shape (81, 47) with float32 values.
+        np.ndarray of shape (81, 47) with uint8 0/1 values.
     """
-    tensor = np.zeros((NUM_AREAS, NUM_FEATURES), dtype=np.float32)
+    tensor = np.zeros((NUM_AREAS, NUM_FEATURES), dtype=np.uint8)
 
     # Static province type features (always the same)
-    for area, idx in AREA_INDEX.items():
-        ptype = _province_type_vec(area)
-        tensor[idx, FEAT_PROVINCE_TYPE:FEAT_PROVINCE_TYPE + 3] = ptype
+    tensor[:, FEAT_PROVINCE_TYPE:FEAT_PROVINCE_TYPE + 3] = _PROVINCE_TYPE_BLOCK
 
     # Unit positions
     units = phase.get("units", {})
@@ -282,14 +294,13 @@ def encode_board_state(phase: dict, prev_phase: dict | None = None) -> np.ndarra
                     _set_unit_features(tensor, var_idx, utype, power_idx)
 
     # Mark empty units
-    for idx in range(NUM_AREAS):
-        if tensor[idx, FEAT_UNIT_TYPE] == 0 and tensor[idx, FEAT_UNIT_TYPE + 1] == 0:
-            tensor[idx, FEAT_UNIT_TYPE + 2] = 1.0  # empty
-            tensor[idx, FEAT_UNIT_OWNER + NUM_POWERS] = 1.0  # owner = none
+    empty = (tensor[:, FEAT_UNIT_TYPE] == 0) & (tensor[:, FEAT_UNIT_TYPE + 1] == 0)
+    tensor[empty, FEAT_UNIT_TYPE + 2] = 1.0  # empty
+    tensor[empty, FEAT_UNIT_OWNER + NUM_POWERS] = 1.0  # owner = none
 
     # Supply center ownership
     centers = phase.get("centers", {})
-    owned_centers: set[str] = set()
+    owned = np.zeros(NUM_AREAS, dtype=bool)
     for power, center_list in centers.items():
         power_idx = POWER_INDEX.get(power)
         if power_idx is None:
@@ -297,27 +308,22 @@ def encode_board_state(phase: dict, prev_phase: dict | None = None) -> np.ndarra
         for prov in center_list:
             if prov not in PROVINCE_SET:
                 continue
-            owned_centers.add(prov)
             area_idx = AREA_INDEX.get(prov)
             if area_idx is None:
                 continue
             tensor[area_idx, FEAT_SC_OWNER + power_idx] = 1.0
+            owned[area_idx] = True
             # Also mark on bicoastal variants
             if prov in SPLIT_COASTS:
                 for coast in SPLIT_COASTS[prov]:
                     var_idx = AREA_INDEX.get(f"{prov}/{coast}")
                     if var_idx is not None:
                         tensor[var_idx, FEAT_SC_OWNER + power_idx] = 1.0
+                        owned[var_idx] = True
 
     # Mark neutral and non-SC areas
-    all_sc = _get_all_supply_centers()
-    for area, idx in AREA_INDEX.items():
-        base = area.split("/")[0]
-        if base in all_sc:
-            if base not in owned_centers:
-                tensor[idx, FEAT_SC_OWNER + NUM_POWERS] = 1.0  # neutral
-        else:
-            tensor[idx, FEAT_SC_OWNER + NUM_POWERS + 1] = 1.0  # none (not an SC)
+    tensor[_SC_AREA_MASK & ~owned, FEAT_SC_OWNER + NUM_POWERS] = 1.0  # neutral
+    tensor[~_SC_AREA_MASK, FEAT_SC_OWNER + NUM_POWERS + 1] = 1.0  # none (not an SC)
 
     # Can build / can disband (only meaningful in adjustment phases, but encode always)
     phase_type = phase.get("type", "movement")
@@ -379,20 +385,9 @@ def _encode_prev_state(tensor: np.ndarray, prev_phase: dict | None):
                         _set_prev_unit_features(tensor, var_idx, utype, power_idx)
 
     # Mark empty areas in previous-state channels
-    for idx in range(NUM_AREAS):
-        if tensor[idx, FEAT_PREV_UNIT_TYPE] == 0 and tensor[idx, FEAT_PREV_UNIT_TYPE + 1] == 0:
-            tensor[idx, FEAT_PREV_UNIT_TYPE + 2] = 1.0  # empty
-            tensor[idx, FEAT_PREV_UNIT_OWNER + NUM_POWERS] = 1.0  # owner = none
-
-
-def _get_all_supply_centers() -> frozenset:
-    """Return the set of all supply center provinces on the standard map."""
-    return frozenset([
-        "ank", "bel", "ber", "bre", "bud", "bul", "con", "den", "edi",
-        "gre", "hol", "kie", "lon", "lvp", "mar", "mos", "mun", "nap",
-        "nwy", "par", "por", "rom", "rum", "ser", "sev", "smy", "spa",
-        "stp", "swe", "tri", "tun", "ven", "vie", "war",
-    ])
+    empty = (tensor[:, FEAT_PREV_UNIT_TYPE] == 0) & (tensor[:, FEAT_PREV_UNIT_TYPE + 1] == 0)
+    tensor[empty, FEAT_PREV_UNIT_TYPE + 2] = 1.0  # empty
+    tensor[empty, FEAT_PREV_UNIT_OWNER + NUM_POWERS] = 1.0  # owner = none
 
 
 def _encode_build_disband(
@@ -482,10 +477,9 @@ def _encode_dislodged(
                 tensor[area_idx, FEAT_DISLODGED_OWNER + pidx] = 1.0
 
     # Mark non-dislodged slots
-    for idx in range(NUM_AREAS):
-        if tensor[idx, FEAT_DISLODGED_TYPE] == 0 and tensor[idx, FEAT_DISLODGED_TYPE + 1] == 0:
-            tensor[idx, FEAT_DISLODGED_TYPE + 2] = 1.0  # none
-            tensor[idx, FEAT_DISLODGED_OWNER + NUM_POWERS] = 1.0  # owner = none
+    none = (tensor[:, FEAT_DISLODGED_TYPE] == 0) & (tensor[:, FEAT_DISLODGED_TYPE + 1] == 0)
+    tensor[none, FEAT_DISLODGED_TYPE + 2] = 1.0  # none
+    tensor[none, FEAT_DISLODGED_OWNER + NUM_POWERS] = 1.0  # owner = none
 
 
 # ---- Order encoding ----
@@ -493,14 +487,6 @@ def _encode_dislodged(
 ORDER_TYPES = ["hold", "move", "support", "convoy", "retreat", "build", "disband"]
 ORDER_TYPE_INDEX = {t: i for i, t in enumerate(ORDER_TYPES)}
 
-ORDER_RE = re.compile(
-    r"^(?P<utype>[AF])\s+(?P<loc>\S+)"
-    r"(?:\s+(?P<action>[-HSCBDR]|VIA)"
-    r"(?:\s+(?P<rest>.+))?)?\s*$",
-    re.IGNORECASE,
-)
-
-
 def parse_order(order_str: str) -> dict | None:
     """Parse an order string into structured components.
 
@@ -547,36 +533,39 @@ def parse_order(order_str: str) -> dict | None:
     return {"type": "hold", "unit": utype, "src": src}
 
 
+@lru_cache(maxsize=None)
 def encode_order_label(order_str: str) -> np.ndarray:
     """Encode a single order as a feature vector.
 
-    Returns a vector of length (7 + 81 + 81) = 169:
+    Returns a uint8 vector of length (7 + 81 + 81) = 169:
       [0:7]    order type one-hot
       [7:88]   source area one-hot
       [88:169] destination area one-hot (zeros for hold/build/disband)
+
+    Results are cached per order string and returned read-only; copy
+    before modifying.
     """
     vec_len = len(ORDER_TYPES) + NUM_AREAS + NUM_AREAS
-    vec = np.zeros(vec_len, dtype=np.float32)
+    vec = np.zeros(vec_len, dtype=np.uint8)
 
     parsed = parse_order(order_str)
-    if parsed is None:
-        return vec
-
-    otype = parsed.get("type", "hold")
-    otype_idx = ORDER_TYPE_INDEX.get(otype, 0)
-    vec[otype_idx] = 1.0
-
-    src = parsed.get("src", "")
-    src_idx = AREA_INDEX.get(src)
-    if src_idx is not None:
-        vec[len(ORDER_TYPES) + src_idx] = 1.0
-
-    dst = parsed.get("dst", "")
-    if dst:
-        dst_idx = AREA_INDEX.get(dst)
-        if dst_idx is not None:
-            vec[len(ORDER_TYPES) + NUM_AREAS + dst_idx] = 1.0
-
+    if parsed is not None:
+        otype = parsed.get("type", "hold")
+        otype_idx = ORDER_TYPE_INDEX.get(otype, 0)
+        vec[otype_idx] = 1.0
+
+        src = parsed.get("src", "")
+        src_idx = AREA_INDEX.get(src)
+        if src_idx is not None:
+            vec[len(ORDER_TYPES) + src_idx] = 1.0
+
+        dst = parsed.get("dst", "")
+        if dst:
+            dst_idx = AREA_INDEX.get(dst)
+            if dst_idx is not None:
+                vec[len(ORDER_TYPES) + NUM_AREAS + dst_idx] = 1.0
+
+    vec.flags.writeable = False
     return vec
 
 
@@ -700,28 +689,44 @@ def save_dataset(samples: list[dict], output_path: Path):
     """Save a list of samples to a compressed .npz file.
 
     Saves:
-      boards: [N, 81, 47]
-      order_types: [N, max_orders, 169] (padded)
-      values: [N, 4]
+      boards: [B, 81, 47] uint8, one per distinct board (B <= N)
+      board_indices: [N] index into boards for each sample
+      order_types: [N, max_orders, 169] uint8 (padded)
+      order_masks: [N, max_orders] uint8
+      values: [N, 4] float32
       power_indices: [N]
       years: [N]
+
+    One-hot arrays are stored as uint8; loaders cast them to float32.
+    Every power moving in a phase shares that phase's board, so boards are
+    stored once and samples refer to them through board_indices.
     """
     if not samples:
         log.warning("No samples to save for %s", output_path)
         return
 
     n = len(samples)
-    boards = np.stack([s["board"] for s in samples])
+    # extract_game_samples hands every power the same board object.
+    board_slots: dict[int, int] = {}
+    unique_boards = []
+    board_indices = np.empty(n, dtype=np.int32)
+    for i, s in enumerate(samples):
+        slot = board_slots.get(id(s["board"]))
+        if slot is None:
+            slot = board_slots[id(s["board"])] = len(unique_boards)
+            unique_boards.append(s["board"])
+        board_indices[i] = slot
+    boards = np.stack(unique_boards)
 
     # Pad orders to max length in this split
-    max_orders = max(len(s["orders"]) for s in samples)
+    num_orders = np.array([len(s["orders"]) for s in samples])
+    max_orders = int(num_orders.max())
     order_dim = len(ORDER_TYPES) + NUM_AREAS + NUM_AREAS  # 169
-    order_labels = np.zeros((n, max_orders, order_dim), dtype=np.float32)
-    order_masks = np.zeros((n, max_orders), dtype=np.float32)
+    order_labels = np.zeros((n, max_orders, order_dim), dtype=np.uint8)
     for i, s in enumerate(samples):
-        for j, ov in enumerate(s["orders"]):
-            order_labels[i, j] = ov
-            order_masks[i, j] = 1.0
+        if len(s["orders"]):
+            order_labels[i, :len(s["orders"])] = s["orders"]
+    order_masks = (np.arange(max_orders) < num_orders[:, None]).astype(np.uint8)
 
     values = np.stack([s["value"] for s in samples])
     power_indices = np.array([s["power_idx"] for s in samples], dtype=np.int32)
@@ -731,6 +736,7 @@ def save_dataset(samples: list[dict], output_path: Path):
     np.savez_compressed(
         output_path,
         boards=boards,
+        board_indices=board_indices,
         order_labels=order_labels,
         order_masks=order_masks,
         values=values,
@@ -741,6 +747,18 @@ def save_dataset(samples: list[dict], output_path: Path):
     log.info("Saved %d samples to %s (%.1f MB)", n, output_path.name, size_mb)
 
 
+def load_board_indices(data) -> np.ndarray:
+    """Per-sample index into ``data["boards"]`` for a loaded dataset .npz.
+
+    Files written by save_dataset share one board across a phase's samples
+    via ``board_indices``; older files and convert_selfplay.py output store
+    one board per sample, so each sample indexes its own row.
+    """
+    if "board_indices" in data:
+        return data["board_indices"]
+    return np.arange(len(data["power_indices"]))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Extract features from parsed Diplomacy games for neural network training"
@@ -769,32 +787,28 @@ def main():
         log.error("Input file not found: %s. Run parse.py first.", args.input)
         sys.exit(1)
 
-    # Load games
-    log.info("Loading games from %s ...", args.input)
-    games = []
+    # Stream games straight into sample extraction so parsed games never
+    # pile up in memory alongside their samples.
+    log.info("Extracting features from %s ...", args.input)
+    all_samples = []
+    num_games = 0
     with open(args.input, "r") as f:
-        for idx, line in enumerate(f):
+        for line in f:
             line = line.strip()
             if not line:
                 continue
             try:
-                games.append(json.loads(line))
+                game = json.loads(line)
             except json.JSONDecodeError:
                 continue
-            if args.limit > 0 and len(games) >= args.limit:
+            all_samples.extend(extract_game_samples(game))
+            num_games += 1
+            if num_games % 5000 == 0:
+                log.info("  ... processed %d games (%d samples)", num_games, len(all_samples))
+            if args.limit > 0 and num_games >= args.limit:
                 break
-    log.info("Loaded %d games", len(games))
-
-    # Extract samples
-    log.info("Extracting features ...")
-    all_samples = []
-    for i, game in enumerate(games):
-        samples = extract_game_samples(game)
-        all_samples.extend(samples)
-        if (i + 1) % 5000 == 0:
-            log.info("  ... processed %d games (%d samples)", i + 1, len(all_samples))
 
-    log.info("Extracted %d total samples from %d games", len(all_samples), len(games))
+    log.info("Extracted %d total samples from %d games", len(all_samples), num_games)
 
     if not all_samples:
         log.error("No samples extracted. Check input data.")
@@ -813,7 +827,7 @@ def main():
     # Save adjacency matrix
     adj = build_adjacency_matrix()
     adj_path = out / "adjacency.npy"
-    np.save(adj_path, adj)
+    np.save(adj_path, adj.astype(np.uint8))
     log.info("Saved adjacency matrix (%d x %d) to %s", adj.shape[0], adj.shape[1], adj_path.name)
 
     # Save metadata
@@ -827,7 +841,7 @@ def main():
         "train_samples": len(train),
         "val_samples": len(val),
         "test_samples": len(test),
-        "total_games": len(games),
+        "total_games": num_games,
         "seed": args.seed,
     }
     meta_path = out / "metadata.json"
@@ -837,7 +851,7 @@ def main():
 
     # Summary
     print("\n=== Feature Extraction Summary ===")
-    print(f"Games processed:  {len(games)}")
+    print(f"Games processed:  {num_games}")
     print(f"Total samples:    {len(all_samples)}")
     print(f"  Train:          {len(train)}")
     print(f"  Validation:     {len(val)}")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Tests for the opening book extraction pipeline.
+
+Verifies that serial and multi-process aggregation agree and that the
+book built from them has the expected entries, using synthetic game data.
+"""
+
+import gzip
+import json
+
+import pytest
+
+import extract_openings
+from extract_openings import (
+    POWERS,
+    build_opening_book,
+    process_games,
+    write_opening_book,
+)
+
+_UNITS = {
+    "austria": ["A vie", "A bud", "F tri"],
+    "england": ["F lon", "F edi", "A lvp"],
+    "france": ["A par", "A mar", "F bre"],
+    "germany": ["A ber", "A mun", "F kie"],
+    "italy": ["A rom", "A ven", "F nap"],
+    "russia": ["A mos", "A war", "F sev", "F stp/sc"],
+    "turkey": ["A con", "A smy", "F ank"],
+}
+
+_SPRING_ORDERS = {
+    "austria": ["A vie - gal", "A bud - ser", "F tri - alb"],
+    "england": ["F lon - nth", "F edi - nwg", "A lvp - yor"],
+    "france": ["A par - bur", "A mar - spa", "F bre - mao"],
+    "germany": ["A ber - kie", "A mun - ruh", "F kie - den"],
+    "italy": ["A rom - apu", "A ven H", "F nap - ion"],
+    "russia": ["A mos - ukr", "A war - gal", "F sev - bla", "F stp/sc - bot"],
+    "turkey": ["A con - bul", "A smy - con", "F ank - bla"],
+}
+
+# England's fall orders: the main line and a rarer alternative.
+_ENGLAND_FALL_MAIN = ["F lon - eng", "F edi - nth", "A lvp - yor"]
+_ENGLAND_FALL_ALT = ["F lon H", "F edi - nwg", "A lvp - edi"]
+
+# 1901 clusters need 1000 games before they qualify for the book.
+_NUM_GAMES = 1000
+# Every eighth game plays the alternative: 125 games, above the 10% cutoff.
+_ALT_EVERY = 8
+
+
+def _centers() -> dict:
+    """Home SCs, taken from the starting unit locations."""
+    return {
+        power: [u.split()[1].split("/")[0] for u in units]
+        for power, units in _UNITS.items()
+    }
+
+
+def _make_phase(name: str, orders: dict) -> dict:
+    """Create a 1901 movement phase where every unit sits on its home SC."""
+    return {
+        "name": name,
+        "units": {power: list(units) for power, units in _UNITS.items()},
+        "centers": _centers(),
+        "orders": orders,
+        "results": {},
+    }
+
+
+def _make_game(game_id: int, england_fall: list[str], fall: bool = True) -> dict:
+    """Create a standard game with S1901M and (optionally) F1901M."""
+    phases = [_make_phase("S1901M", _SPRING_ORDERS)]
+    if fall:
+        fall_orders = {power: [f"{u} H" for u in units] for power, units in _UNITS.items()}
+        fall_orders["england"] = england_fall
+        phases.append(_make_phase("F1901M", fall_orders))
+    outcome = {power: {"centers": 3, "result": "survive"} for power in POWERS}
+    if game_id % 10 == 0:
+        outcome["england"] = {"centers": 18, "result": "solo"}
+    return {
+        "game_id": str(game_id),
+        "map": "standard",
+        "outcome": outcome,
+        "phases": phases,
+    }
+
+
+def _write_games(path) -> None:
+    """Write the fixture games.jsonl, with a few lines that must be skipped."""
+    lines = []
+    for i in range(_NUM_GAMES):
+        england_fall = _ENGLAND_FALL_ALT if i % _ALT_EVERY == 0 else _ENGLAND_FALL_MAIN
+        lines.append(json.dumps(_make_game(i, england_fall)))
+        if i == 10:
+            lines.append(json.dumps(_make_game(-1, _ENGLAND_FALL_MAIN, fall=False)))
+        elif i == 20:
+            lines.append('{"map": "standard", "phases": [{"name": "S1901M"}, {"name": "F1901M"')
+        elif i == 30:
+            lines.append("")
+    path.write_text("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def games_path(tmp_path, monkeypatch):
+    """Point extract_openings at a fixture games.jsonl split into small chunks."""
+    path = tmp_path / "games.jsonl"
+    _write_games(path)
+    monkeypatch.setattr(extract_openings, "GAMES_PATH", path)
+    monkeypatch.setattr(extract_openings, "CHUNK_LINES", 64)
+    return path
+
+
+class TestProcessGames:
+    """Tests for streaming aggregation of games.jsonl."""
+
+    def test_counts_only_usable_games(self, games_path):
+        _clusters, phase_totals, _pos_totals, total_games = process_games(1)
+        assert total_games == _NUM_GAMES, f"Expected {_NUM_GAMES} games, got {total_games}"
+        for power in POWERS:
+            assert phase_totals[power, "S1901M"] == _NUM_GAMES
+            assert phase_totals[power, "F1901M"] == _NUM_GAMES
+
+    def test_workers_match_serial(self, games_path):
+        serial = process_games(1)
+        parallel = process_games(2)
+        names = ("clusters", "phase_totals", "pos_totals")
+        for name, a, b in zip(names, serial, parallel):
+            # Compare items so first-seen order must match too.
+            assert list(a.items()) == list(b.items()), f"{name} differs with workers=2"
+        assert serial[3] == parallel[3], "total_games differs with workers=2"
+
+
+class TestBuildOpeningBook:
+    """Tests for turning aggregated clusters into book entries."""
+
+    def test_entries(self, games_path):
+        book, covered_games = build_opening_book(*process_games(1))
+        entries = book["entries"]
+        assert len(entries) == 2 * len(POWERS), f"Expected 14 entries, got {len(entries)}"
+
+        keys = [(e["power"], e["year"], e["season"]) for e in entries]
+        expected = [(p, 1901, s) for p in POWERS for s in ("spring", "fall")]
+        assert keys == expected
+
+        for e in entries:
+            n_options = 2 if (e["power"], e["season"]) == ("england", "fall") else 1
+            assert len(e["options"]) == n_options, f"{e['power']} {e['season']}"
+
+    def test_england_fall_options(self, games_path):
+        book, _covered = build_opening_book(*process_games(1))
+        entry = next(
+            e for e in book["entries"] if e["power"] == "england" and e["season"] == "fall"
+        )
+        main, alt = entry["options"]
+        n_alt = len(range(0, _NUM_GAMES, _ALT_EVERY))
+
+        assert main["name"] == "england_F1901M_1"
+        assert alt["name"] == "england_F1901M_2"
+        assert main["_games"] == _NUM_GAMES - n_alt
+        assert alt["_games"] == n_alt
+        assert alt["weight"] == round(n_alt / _NUM_GAMES, 4)
+        assert main["_pos_games"] == alt["_pos_games"] == _NUM_GAMES
+        assert len(main["orders"]) == len(_ENGLAND_FALL_MAIN)
+
+    def test_covered_games(self, games_path):
+        _book, covered_games = build_opening_book(*process_games(1))
+        expected = {
+            (power, phase): _NUM_GAMES
+            for power in POWERS
+            for phase in ("S1901M", "F1901M")
+        }
+        assert dict(covered_games) == expected
+
+    def test_consumes_clusters(self, games_path):
+        clusters, phase_totals, pos_totals, total_games = process_games(1)
+        build_opening_book(clusters, phase_totals, pos_totals, total_games)
+        assert not clusters, "build_opening_book should clear clusters"
+
+
+class TestWriteOpeningBook:
+    """Tests for writing the book to disk."""
+
+    def test_gzip_matches_plain(self, games_path, tmp_path):
+        book, _covered = build_opening_book(*process_games(1))
+        path = tmp_path / "opening_book.json"
+        gz_path = tmp_path / "opening_book.json.gz"
+        write_opening_book(book, path, gzip_path=gz_path)
+
+        with open(path) as f:
+            plain = json.load(f)
+        with gzip.open(gz_path) as f:
+            raw = f.read()
+        assert json.loads(raw) == plain, "gzip copy should decode to the same JSON"
+        assert raw == path.read_bytes()
+        assert plain == book
+
+    def test_stdlib_fallback_matches_orjson(self, games_path, tmp_path, monkeypatch):
+        book, _covered = build_opening_book(*process_games(1))
+        fast = tmp_path / "fast.json"
+        write_opening_book(book, fast)
+        monkeypatch.setattr(extract_openings, "orjson", None)
+        slow = tmp_path / "slow.json"
+        slow_gz = tmp_path / "slow.json.gz"
+        write_opening_book(book, slow, gzip_path=slow_gz)
+
+        assert slow.read_bytes() == fast.read_bytes()
+        with gzip.open(slow_gz) as f:
+            assert f.read() == fast.read_bytes()
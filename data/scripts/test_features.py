@@ -37,6 +37,7 @@ from features import (
     encode_order_label,
     encode_value_labels,
     extract_game_samples,
+    load_board_indices,
     parse_order,
     save_dataset,
     split_dataset,
@@ -173,7 +174,7 @@ class TestBoardStateEncoding:
     def test_dtype(self):
         phase = _make_s1901m_phase()
         tensor = encode_board_state(phase)
-        assert tensor.dtype == np.float32
+        assert tensor.dtype == np.uint8
 
     def test_unit_positions(self):
         """Verify Austrian units are correctly encoded at S1901M."""
@@ -409,6 +410,11 @@ class TestOrderEncoding:
         dst_section = vec[len(ORDER_TYPES) + NUM_AREAS:]
         assert dst_section.sum() == 0.0, "Hold should have no destination"
 
+    def test_encode_order_cached_read_only(self):
+        vec = encode_order_label("A par - bur")
+        assert encode_order_label("A par - bur") is vec
+        assert not vec.flags.writeable, "Cached vector must be read-only"
+
 
 class TestValueLabels:
     """Verify value label encoding."""
@@ -567,10 +573,45 @@ class TestSaveLoad:
             assert "years" in data
 
             n = len(samples)
-            assert data["boards"].shape == (n, 81, 47)
+            assert data["board_indices"].shape == (n,)
+            boards = data["boards"][data["board_indices"]]
+            assert boards.shape == (n, 81, 47)
+            for s, b in zip(samples, boards):
+                assert np.array_equal(s["board"], b)
+            # One board per movement phase, shared by every power
+            assert data["boards"].shape[0] == 2
+            assert data["boards"].dtype == np.uint8
+            assert data["order_labels"].dtype == np.uint8
+            assert data["values"].dtype == np.float32
             assert data["values"].shape == (n, 4)
             assert data["power_indices"].shape == (n,)
 
+    def test_save_sample_without_orders(self):
+        samples = extract_game_samples(_make_test_game())
+        samples[0]["orders"] = []
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "test.npz"
+            save_dataset(samples, path)
+
+            data = np.load(path)
+            assert data["order_masks"][0].sum() == 0
+            assert data["order_labels"][0].sum() == 0
+            assert data["order_masks"][1].sum() == len(samples[1]["orders"])
+
+    def test_load_board_indices(self):
+        samples = extract_game_samples(_make_test_game())
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "test.npz"
+            save_dataset(samples, path)
+            data = np.load(path)
+            assert np.array_equal(load_board_indices(data), data["board_indices"])
+
+        # Files without board_indices store one board per sample
+        legacy = {"power_indices": np.zeros(3, dtype=np.int32)}
+        assert np.array_equal(load_board_indices(legacy), np.arange(3))
+
 
 class TestPreviousStateEncoding:
     """Verify previous-state feature encoding (channels 36..47)."""
@@ -27,6 +27,8 @@ from torch.utils.data import DataLoader, Dataset
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "models"))
 from gnn import DiplomacyPolicyNet
 
+from features import load_board_indices
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -58,13 +60,14 @@ class DiplomacyDataset(Dataset):
     def __init__(self, npz_path: Path):
         log.info("Loading dataset from %s", npz_path)
         data = np.load(npz_path)
-        self.boards = data["boards"]            # [N, 81, 47]
+        self.boards = data["boards"]            # [B, 81, 47]
         self.order_labels = data["order_labels"] # [N, max_orders, 169]
         self.order_masks = data["order_masks"]   # [N, max_orders]
         self.power_indices = data["power_indices"] # [N]
         self.values = data["values"]             # [N, 4]
+        self.board_indices = load_board_indices(data)
 
-        self.n_samples = self.boards.shape[0]
+        self.n_samples = len(self.board_indices)
         self.max_orders = self.order_labels.shape[1]
         log.info("  %d samples, max_orders=%d", self.n_samples, self.max_orders)
 
@@ -72,9 +75,9 @@ class DiplomacyDataset(Dataset):
         return self.n_samples
 
     def __getitem__(self, idx: int) -> dict:
-        board = torch.from_numpy(self.boards[idx])          # [81, 47]
-        order_labels = torch.from_numpy(self.order_labels[idx])  # [max_orders, 169]
-        order_mask = torch.from_numpy(self.order_masks[idx])     # [max_orders]
+        board = torch.from_numpy(self.boards[self.board_indices[idx]]).float()  # [81, 47]
+        order_labels = torch.from_numpy(self.order_labels[idx]).float()  # [max_orders, 169]
+        order_mask = torch.from_numpy(self.order_masks[idx]).float()     # [max_orders]
         power_idx = int(self.power_indices[idx])
 
         # Extract unit source province indices from order labels
@@ -272,7 +275,7 @@ def train(args):
         log.error("Adjacency matrix not found: %s. Run features.py first.", adj_path)
         sys.exit(1)
     adj_np = np.load(adj_path)
-    adj = torch.from_numpy(adj_np).to(device)  # [81, 81]
+    adj = torch.from_numpy(adj_np).float().to(device)  # [81, 81]
 
     # Load datasets
     train_ds = DiplomacyDataset(Path(args.data_dir) / "train.npz")
@@ -32,6 +32,8 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "models"))
 from autoregressive_decoder import DiplomacyAutoRegressivePolicyNet
 from gnn import DiplomacyPolicyNet
 
+from features import load_board_indices
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -63,8 +65,9 @@ class DiplomacyDataset(Dataset):
         self.order_masks = data["order_masks"]
         self.power_indices = data["power_indices"]
         self.values = data["values"]
+        self.board_indices = load_board_indices(data)
 
-        self.n_samples = self.boards.shape[0]
+        self.n_samples = len(self.board_indices)
         self.max_orders = self.order_labels.shape[1]
         log.info("  %d samples, max_orders=%d", self.n_samples, self.max_orders)
 
@@ -72,9 +75,9 @@ class DiplomacyDataset(Dataset):
         return self.n_samples
 
     def __getitem__(self, idx: int) -> dict:
-        board = torch.from_numpy(self.boards[idx])
-        order_labels = torch.from_numpy(self.order_labels[idx])
-        order_mask = torch.from_numpy(self.order_masks[idx])
+        board = torch.from_numpy(self.boards[self.board_indices[idx]]).float()
+        order_labels = torch.from_numpy(self.order_labels[idx]).float()
+        order_mask = torch.from_numpy(self.order_masks[idx]).float()
         power_idx = int(self.power_indices[idx])
 
         # Extract unit source province indices from order labels
@@ -248,7 +251,7 @@ def train(args):
         log.error("Adjacency matrix not found: %s. Run features.py first.", adj_path)
         sys.exit(1)
     adj_np = np.load(adj_path)
-    adj = torch.from_numpy(adj_np).to(device)
+    adj = torch.from_numpy(adj_np).float().to(device)
 
     # Load datasets
     train_ds = DiplomacyDataset(Path(args.data_dir) / "train.npz")
@@ -40,6 +40,8 @@ from torch.utils.data import DataLoader, Dataset
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "models"))
 from gnn import DiplomacyPolicyNet
 
+from features import load_board_indices
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -82,9 +84,9 @@ class SelfPlayDataset(Dataset):
         return self.n_samples
 
     def __getitem__(self, idx: int) -> dict:
-        board = torch.from_numpy(self.boards[idx])
-        order_labels = torch.from_numpy(self.order_labels[idx])
-        order_mask = torch.from_numpy(self.order_masks[idx])
+        board = torch.from_numpy(self.boards[idx]).float()
+        order_labels = torch.from_numpy(self.order_labels[idx]).float()
+        order_mask = torch.from_numpy(self.order_masks[idx]).float()
         power_idx = int(self.power_indices[idx])
         reward = float(self.rewards[idx])
 
@@ -114,7 +116,8 @@ class SupervisedDataset(Dataset):
         self.order_labels = data["order_labels"]
         self.order_masks = data["order_masks"]
         self.power_indices = data["power_indices"]
-        self.n_samples = self.boards.shape[0]
+        self.board_indices = load_board_indices(data)
+        self.n_samples = len(self.board_indices)
         self.max_orders = self.order_labels.shape[1]
         log.info("  %d samples, max_orders=%d", self.n_samples, self.max_orders)
 
@@ -122,9 +125,9 @@ class SupervisedDataset(Dataset):
         return self.n_samples
 
     def __getitem__(self, idx: int) -> dict:
-        board = torch.from_numpy(self.boards[idx])
-        order_labels = torch.from_numpy(self.order_labels[idx])
-        order_mask = torch.from_numpy(self.order_masks[idx])
+        board = torch.from_numpy(self.boards[self.board_indices[idx]]).float()
+        order_labels = torch.from_numpy(self.order_labels[idx]).float()
+        order_mask = torch.from_numpy(self.order_masks[idx]).float()
         power_idx = int(self.power_indices[idx])
 
         src_section = order_labels[:, ORDER_TYPES:ORDER_TYPES + NUM_AREAS]
@@ -447,7 +450,7 @@ def train(args):
         log.error("Adjacency matrix not found: %s", adj_path)
         sys.exit(1)
     adj_np = np.load(adj_path)
-    adj = torch.from_numpy(adj_np).to(device)
+    adj = torch.from_numpy(adj_np).float().to(device)
 
     # Load self-play dataset
     sp_ds = SelfPlayDataset(Path(args.selfplay_data))
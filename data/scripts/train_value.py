@@ -27,6 +27,8 @@ from torch.utils.data import DataLoader, Dataset
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "models"))
 from value_net import DiplomacyValueNet
 
+from features import load_board_indices
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -54,10 +56,11 @@ class ValueDataset(Dataset):
     def __init__(self, npz_path: Path):
         log.info("Loading dataset from %s", npz_path)
         data = np.load(npz_path)
-        self.boards = data["boards"]              # [N, 81, 47]
+        self.boards = data["boards"]              # [B, 81, 47]
         self.power_indices = data["power_indices"] # [N]
         self.values = data["values"]               # [N, 4]
-        self.n_samples = self.boards.shape[0]
+        self.board_indices = load_board_indices(data)
+        self.n_samples = len(self.board_indices)
         log.info("  %d samples", self.n_samples)
 
     def __len__(self) -> int:
@@ -65,7 +68,7 @@ class ValueDataset(Dataset):
 
     def __getitem__(self, idx: int) -> dict:
         return {
-            "board": torch.from_numpy(self.boards[idx]),
+            "board": torch.from_numpy(self.boards[self.board_indices[idx]]).float(),
             "power_idx": int(self.power_indices[idx]),
             "value": torch.from_numpy(self.values[idx]),
         }
@@ -235,7 +238,7 @@ def train(args):
         log.error("Adjacency matrix not found: %s. Run features.py first.", adj_path)
         sys.exit(1)
     adj_np = np.load(adj_path)
-    adj = torch.from_numpy(adj_np).to(device)
+    adj = torch.from_numpy(adj_np).float().to(device)
 
     # Load datasets
     train_ds = ValueDataset(Path(args.data_dir) / "train.npz")